@@ -0,0 +1,509 @@
+import argparse
+import json
+import os
+import platform
+import random
+import selectors
+import socket
+import subprocess
+import sys
+import time
+
+from mahjong2040.packets import (
+    CAPABILITIES,
+    PROTOCOL_VERSION,
+    DrawClientPacket,
+    DrawServerPacket,
+    DrawTenpaiServerPacket,
+    GameStateDeltaServerPacket,
+    GameStatePacket,
+    GameStateRequestClientPacket,
+    GameStateServerPacket,
+    HelloClientPacket,
+    JoinTableClientPacket,
+    Packet,
+    PacketReader,
+    PacketWriter,
+    PingServerPacket,
+    PongClientPacket,
+    ResumeClientPacket,
+    ResumeTokenServerPacket,
+    RiichiClientPacket,
+    RonScoreClientPacket,
+    RonServerPacket,
+    RonWindClientPacket,
+    RonWindServerPacket,
+    SetupPlayerWindClientPacket,
+    SetupPlayerWindServerPacket,
+    TsumoClientPacket,
+    TsumoServerPacket,
+)
+from mahjong2040.shared import Tenpai, Wind
+
+ACTIONS = ('riichi', 'tsumo', 'ron', 'draw')
+ACTION_WEIGHTS = (3, 3, 3, 2)
+GAME_STATE_PACKETS = (GameStateServerPacket, GameStateDeltaServerPacket)
+FU_INDEX = 2
+MAX_HANDS = 200
+
+
+class Bot:
+  def __init__(self, loadgen: 'LoadGen', table: 'Table', seat: int):
+    self.loadgen = loadgen
+    self.table = table
+    self.seat = seat
+    self.socket: socket.socket | None = None
+    self.reader = PacketReader()
+    self.writer = PacketWriter()
+    self.connecting = False
+    self.token: bytes | None = None
+    self.game_state = None
+    self.seq: int | None = 0
+
+  def connect(self):
+    self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    self.socket.setblocking(False)
+    self.socket.connect_ex(self.loadgen.address)
+    self.reader = PacketReader()
+    self.writer = PacketWriter()
+    self.connecting = True
+    self.loadgen.selector.register(self.socket, selectors.EVENT_WRITE, self)
+
+  def disconnect(self):
+    if self.socket is None:
+      return
+
+    self.loadgen.selector.unregister(self.socket)
+    self.socket.close()
+    self.socket = None
+
+  def on_connected(self):
+    error = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+    if error:
+      self.disconnect()
+      return self.table.on_error(f'connect: {os.strerror(error)}')
+
+    self.connecting = False
+    self.loadgen.selector.modify(self.socket, selectors.EVENT_READ, self)
+    self.send(HelloClientPacket(PROTOCOL_VERSION, CAPABILITIES))
+    if self.token is not None:
+      self.send(ResumeClientPacket(self.token))
+    self.send(JoinTableClientPacket(self.table.index))
+
+  def on_event(self, events: int):
+    if self.connecting:
+      return self.on_connected()
+
+    if events & selectors.EVENT_WRITE:
+      self.flush()
+      if self.socket is None:
+        return
+    if not events & selectors.EVENT_READ:
+      return
+
+    if not self.reader.read(self.socket):
+      self.disconnect()
+      return self.table.on_error('server closed the connection')
+
+    for packet in self.reader.packets():
+      self.on_packet(packet)
+
+  def send(self, packet: Packet):
+    if self.socket is None:
+      return
+
+    self.writer.write_packet(packet)
+    self.flush()
+
+  def flush(self):
+    try:
+      flushed = self.writer.flush(self.socket)
+    except OSError as e:
+      self.disconnect()
+      return self.table.on_error(f'send: {e}')
+
+    events = selectors.EVENT_READ if flushed else selectors.EVENT_READ | selectors.EVENT_WRITE
+    if self.loadgen.selector.get_key(self.socket).events != events:
+      self.loadgen.selector.modify(self.socket, events, self)
+
+  def on_packet(self, packet: Packet):
+    if isinstance(packet, PingServerPacket):
+      return self.send(PongClientPacket(packet.stamp))
+    elif isinstance(packet, ResumeTokenServerPacket):
+      self.token = packet.token
+      return
+    elif isinstance(packet, SetupPlayerWindServerPacket):
+      if self.game_state is None and packet.wind == self.seat:
+        self.send(SetupPlayerWindClientPacket(self.seat))
+    elif isinstance(packet, GameStatePacket):
+      self.game_state = packet.game_state
+      self.seq = None
+    elif isinstance(packet, GameStateDeltaServerPacket):
+      if self.game_state is None or self.seq is not None and packet.seq != self.seq + 1:
+        self.send(GameStateRequestClientPacket())
+      else:
+        self.game_state = packet.apply(self.game_state)
+        self.seq = packet.seq
+    elif isinstance(packet, RonWindServerPacket):
+      self.send(RonScoreClientPacket(self.table.ron_han(self), FU_INDEX))
+    elif isinstance(packet, DrawTenpaiServerPacket):
+      if packet.tenpai == Tenpai.UNKNOWN:
+        self.send(DrawClientPacket(random.choice((Tenpai.TENPAI, Tenpai.NOTEN))))
+
+    self.table.on_packet(self, packet)
+
+
+class Table:
+  def __init__(self, loadgen: 'LoadGen', index: int):
+    self.loadgen = loadgen
+    self.index = index
+    self.bots = [Bot(loadgen, self, seat) for seat in range(len(Wind))]
+    self.ready = False
+    self.done = False
+    self.hands = 0
+    self.action: str | None = None
+    self.started = 0.0
+    self.expected: list[tuple] = []
+    self.progress = [0] * len(Wind)
+    self.broadcasts = 0
+    self.claimant: Bot | None = None
+    self.next_action = 0.0
+
+  def connect(self):
+    for bot in self.bots:
+      bot.connect()
+
+  def close(self):
+    for bot in self.bots:
+      bot.disconnect()
+
+  def on_error(self, error: str):
+    self.loadgen.errors.append(f'table {self.index}: {error}')
+    self.done = True
+    self.action = None
+
+  def on_packet(self, bot: Bot, packet: Packet):
+    if not self.ready:
+      if all(other.game_state is not None for other in self.bots):
+        self.ready = True
+        self.next_action = time.perf_counter()
+      return
+
+    if self.action is None:
+      return
+
+    index = self.progress[bot.seat]
+    expected = self.expected[bot.seat]
+    if index >= len(expected) or not isinstance(packet, expected[index]):
+      return
+
+    self.progress[bot.seat] += 1
+    if index == 0:
+      self.broadcasts += 1
+      if self.broadcasts == len(self.bots):
+        self.loadgen.record(self.action, time.perf_counter() - self.started)
+
+    if all(self.progress[seat] == len(self.expected[seat]) for seat in range(len(self.bots))):
+      self.on_complete()
+
+  def on_complete(self):
+    if self.action in ('tsumo', 'ron', 'draw'):
+      self.hands += 1
+      self.loadgen.hands += 1
+      if self.hands >= self.loadgen.max_hands:
+        self.done = True
+
+    self.action = None
+    self.claimant = None
+    self.next_action = time.perf_counter() + self.loadgen.think
+
+  def ron_han(self, bot: Bot):
+    return random.randint(1, 6) if bot is self.claimant else 0
+
+  def start(self, action: str, expected: tuple, seat_expected: dict[int, tuple] | None = None):
+    self.action = action
+    self.started = time.perf_counter()
+    self.expected = [
+        (seat_expected or {}).get(seat, expected)
+        for seat in range(len(self.bots))
+    ]
+    self.progress = [0] * len(self.bots)
+    self.broadcasts = 0
+
+  def step(self, now: float):
+    if not self.ready or self.done or self.action is not None:
+      return
+
+    if now < self.next_action:
+      return
+
+    game_state = self.bots[0].game_state
+    if random.random() < self.loadgen.disconnect_rate:
+      return self.reconnect(random.choice(self.bots))
+
+    action = random.choices(ACTIONS, ACTION_WEIGHTS)[0]
+    seat = random.randrange(len(self.bots))
+    bot = self.bots[seat]
+    if action == 'riichi':
+      candidates = [
+          other
+          for index, other in enumerate(self.bots)
+          if not game_state.players[index].riichi
+      ]
+      if not candidates:
+        action = 'tsumo'
+      else:
+        bot = random.choice(candidates)
+
+    if action == 'riichi':
+      self.start(action, (GAME_STATE_PACKETS,))
+      bot.send(RiichiClientPacket())
+    elif action == 'tsumo':
+      self.start(action, (TsumoServerPacket,))
+      bot.send(TsumoClientPacket(random.randint(1, 6), FU_INDEX))
+    elif action == 'ron':
+      target = random.choice([index for index in range(len(self.bots)) if index != seat])
+      self.claimant = bot
+      self.start(action, (RonServerPacket, GameStateServerPacket))
+      bot.send(RonWindClientPacket((target - game_state.hand) % len(Wind)))
+    elif action == 'draw':
+      self.start(action, (DrawServerPacket, GameStateServerPacket))
+      bot.send(DrawClientPacket(random.choice((Tenpai.TENPAI, Tenpai.NOTEN))))
+
+  def reconnect(self, bot: Bot):
+    if bot.token is None:
+      return
+
+    self.start(
+        'reconnect',
+        (GameStateServerPacket,),
+        {bot.seat: (GameStateServerPacket, GameStateServerPacket)},
+    )
+    bot.disconnect()
+    bot.connect()
+
+  def check_timeout(self, now: float):
+    if self.action is not None and now - self.started > self.loadgen.action_timeout:
+      self.on_error(f'{self.action} timed out')
+
+
+class LoadGen:
+  def __init__(
+      self,
+      address: tuple[str, int],
+      tables: int,
+      first_table: int,
+      think: float,
+      disconnect_rate: float,
+      max_hands: int,
+      action_timeout: float,
+  ):
+    self.address = address
+    self.selector = selectors.DefaultSelector()
+    self.tables = [Table(self, first_table + index) for index in range(tables)]
+    self.think = think
+    self.disconnect_rate = disconnect_rate
+    self.max_hands = max_hands
+    self.action_timeout = action_timeout
+    self.latencies: dict[str, list[float]] = {}
+    self.hands = 0
+    self.errors: list[str] = []
+
+  def record(self, action: str, latency: float):
+    self.latencies.setdefault(action, []).append(latency)
+
+  def pump(self, timeout: float):
+    for key, events in self.selector.select(timeout):
+      key.data.on_event(events)
+
+  def connect(self, timeout: float, batch: int):
+    for start in range(0, len(self.tables), batch):
+      for table in self.tables[start:start + batch]:
+        table.connect()
+      self.pump(0)
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+      if all(table.ready or table.done for table in self.tables):
+        return True
+      self.pump(0.01)
+    return False
+
+  def run(self, duration: float):
+    self.hands = 0
+    self.latencies = {}
+    start = time.perf_counter()
+    end = start + duration
+    while True:
+      now = time.perf_counter()
+      if now >= end or all(table.done for table in self.tables):
+        break
+
+      for table in self.tables:
+        table.step(now)
+        table.check_timeout(now)
+      self.pump(0.001)
+    return time.perf_counter() - start
+
+  def close(self):
+    for table in self.tables:
+      table.close()
+    self.selector.close()
+
+
+def percentile(values: list[float], fraction: float):
+  if not values:
+    return None
+  values = sorted(values)
+  return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def process_tree(pid: int):
+  pids = [pid]
+  for pid in pids:
+    try:
+      with open(f'/proc/{pid}/task/{pid}/children') as f:
+        pids.extend(int(child) for child in f.read().split())
+    except OSError:
+      pass
+  return pids
+
+
+def cpu_seconds(pid: int | None):
+  if pid is None:
+    return None
+
+  ticks = os.sysconf('SC_CLK_TCK')
+  total = 0
+  for child in process_tree(pid):
+    try:
+      with open(f'/proc/{child}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+      continue
+    total += int(fields[11]) + int(fields[12])
+  return total / ticks
+
+
+def raise_file_limit():
+  try:
+    import resource
+  except ImportError:
+    return
+
+  soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+  if soft < hard:
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def spawn_server(args):
+  command = [
+      sys.executable, '-m', 'mahjong2040.server',
+      '--port', str(args.port),
+      '--tables', str(args.first_table + args.tables),
+      '--workers', str(args.workers),
+  ]
+  process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+  time.sleep(args.startup)
+  return process
+
+
+def report(args, elapsed: float, loadgen: LoadGen, cpu: float | None):
+  results = {
+      'tables': len(loadgen.tables),
+      'clients': len(loadgen.tables) * len(Wind),
+      'seconds': round(elapsed, 3),
+      'hands': loadgen.hands,
+      'hands_per_sec': round(loadgen.hands / elapsed, 1) if elapsed else 0,
+      'server_cpu_percent': round(cpu / elapsed * 100, 1) if cpu is not None and elapsed else None,
+      'errors': loadgen.errors,
+      'actions': {},
+  }
+
+  latencies = [
+      latency
+      for values in loadgen.latencies.values()
+      for latency in values
+  ]
+  for action, values in [('all', latencies)] + sorted(loadgen.latencies.items()):
+    results['actions'][action] = {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 0.5) * 1000, 2) if values else None,
+        'p99_ms': round(percentile(values, 0.99) * 1000, 2) if values else None,
+    }
+
+  print(f'{results["clients"]} clients on {results["tables"]} tables for {results["seconds"]:.1f}s')
+  print(f'{results["hands"]} hands, {results["hands_per_sec"]} hands/s')
+  if results['server_cpu_percent'] is not None:
+    print(f'server CPU {results["server_cpu_percent"]}%')
+  print(f'{"action":12} {"count":>8} {"p50 ms":>9} {"p99 ms":>9}')
+  for action, result in results['actions'].items():
+    p50 = '-' if result['p50_ms'] is None else f'{result["p50_ms"]:.2f}'
+    p99 = '-' if result['p99_ms'] is None else f'{result["p99_ms"]:.2f}'
+    print(f'{action:12} {result["count"]:8d} {p50:>9} {p99:>9}')
+  for error in loadgen.errors[:10]:
+    print('error:', error)
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump({
+          'python': platform.python_implementation() + ' ' + platform.python_version(),
+          'platform': platform.platform(),
+          'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+          'options': vars(args),
+          'results': results,
+      }, f, indent=2)
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Drive a mahjong2040 server with simulated badges')
+  parser.add_argument('--host', default='127.0.0.1', help='server address')
+  parser.add_argument('--port', type=int, default=1246, help='server port')
+  parser.add_argument('--tables', type=int, default=25, help='tables to fill with four simulated clients each')
+  parser.add_argument('--first-table', type=int, default=0, help='table id of the first simulated table')
+  parser.add_argument('--duration', type=float, default=10, help='seconds to play once every table is seated')
+  parser.add_argument('--think', type=float, default=0, help='seconds a table waits between actions')
+  parser.add_argument('--disconnect-rate', type=float, default=0.02, help='chance an action is a disconnect and resume')
+  parser.add_argument('--hands', type=int, default=MAX_HANDS, help='stop a table after this many hands')
+  parser.add_argument('--timeout', type=float, default=10, help='seconds before a seating or action counts as failed')
+  parser.add_argument('--server-pid', type=int, help='measure the CPU time of this server process and its workers')
+  parser.add_argument('--spawn', action='store_true', help='start a local server for the run')
+  parser.add_argument('--workers', type=int, default=1, help='worker processes for a spawned server')
+  parser.add_argument('--startup', type=float, default=1, help='seconds to wait for a spawned server')
+  parser.add_argument('--output', help='write results to this JSON file')
+  args = parser.parse_args()
+
+  if not 1 <= args.hands <= MAX_HANDS:
+    parser.error(f'--hands must be between 1 and {MAX_HANDS}')
+
+  raise_file_limit()
+  server = spawn_server(args) if args.spawn else None
+  server_pid = server.pid if server else args.server_pid
+  loadgen = LoadGen(
+      (args.host, args.port),
+      args.tables,
+      args.first_table,
+      args.think,
+      args.disconnect_rate,
+      args.hands,
+      args.timeout,
+  )
+  try:
+    if not loadgen.connect(args.timeout, 64):
+      seated = sum(1 for table in loadgen.tables if table.ready)
+      loadgen.errors.append(f'only {seated} of {len(loadgen.tables)} tables seated')
+
+    cpu_start = cpu_seconds(server_pid)
+    elapsed = loadgen.run(args.duration)
+    cpu_end = cpu_seconds(server_pid)
+    cpu = cpu_end - cpu_start if cpu_start is not None and cpu_end is not None else None
+    report(args, elapsed, loadgen, cpu)
+  finally:
+    loadgen.close()
+    if server is not None:
+      server.terminate()
+      server.wait()
+
+
+if __name__ == '__main__':
+  main()
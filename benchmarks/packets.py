@@ -0,0 +1,302 @@
+import argparse
+import json
+import platform
+import socket
+import subprocess
+import time
+import tracemalloc
+
+from mahjong2040.packets import (
+    BroadcastClientPacket,
+    BroadcastServerPacket,
+    ConfirmWindServerPacket,
+    DrawClientPacket,
+    DrawServerPacket,
+    DrawTenpaiServerPacket,
+    GameCountersStruct,
+    GameReconnectStatusServerPacket,
+    GameStateDeltaServerPacket,
+    GameStateRequestClientPacket,
+    GameStateServerPacket,
+    HelloClientPacket,
+    HelloServerPacket,
+    JoinTableClientPacket,
+    LengthStruct,
+    LobbyPlayersServerPacket,
+    Packet,
+    PacketBuffer,
+    PacketReader,
+    PacketWriter,
+    PingClientPacket,
+    PingServerPacket,
+    PlayerStruct,
+    PongClientPacket,
+    PongServerPacket,
+    RedrawClientPacket,
+    RedrawServerPacket,
+    ResumeClientPacket,
+    ResumeTokenServerPacket,
+    RiichiClientPacket,
+    RonScoreClientPacket,
+    RonScoreServerPacket,
+    RonServerPacket,
+    RonWindClientPacket,
+    RonWindServerPacket,
+    SetupPlayerCountErrorServerPacket,
+    SetupPlayerWindClientPacket,
+    SetupPlayerWindServerPacket,
+    TsumoClientPacket,
+    TsumoServerPacket,
+    packets,
+    read_packet,
+    send_packet,
+    unpack_packet,
+)
+from mahjong2040.shared import ClientGameState
+
+FRAME_HEADER_SIZE = LengthStruct.size()
+
+
+def game_state():
+  return ClientGameState(
+      2,
+      (
+          PlayerStruct(250, False),
+          PlayerStruct(240, True),
+          PlayerStruct(-30, False),
+          PlayerStruct(540, True),
+      ),
+      250,
+      hand=5,
+      repeat=1,
+      bonus_honba=2,
+      bonus_riichi=1,
+  )
+
+
+def sample_packets() -> list[Packet]:
+  samples = [
+      BroadcastClientPacket(),
+      RiichiClientPacket(),
+      TsumoClientPacket(3, 2),
+      RonWindClientPacket(1),
+      RonScoreClientPacket(4, 3),
+      DrawClientPacket(1),
+      RedrawClientPacket(),
+      SetupPlayerWindClientPacket(2),
+      GameStateRequestClientPacket(),
+      HelloClientPacket(3, 15),
+      PingClientPacket(123456),
+      PongClientPacket(123456),
+      ResumeClientPacket(bytes(range(8))),
+      JoinTableClientPacket(1),
+
+      BroadcastServerPacket(),
+      GameStateServerPacket(game_state()),
+      DrawTenpaiServerPacket(1),
+      RedrawServerPacket(),
+      RonWindServerPacket(3, True),
+      RonScoreServerPacket(2, -120),
+      SetupPlayerWindServerPacket(1),
+      ConfirmWindServerPacket(0),
+      SetupPlayerCountErrorServerPacket(),
+      LobbyPlayersServerPacket(3, 4),
+      GameReconnectStatusServerPacket({0, 2}),
+      TsumoServerPacket(1, 5, (-40, 120, -40, -40), game_state()),
+      RonServerPacket(2, 5, (0, 0, 80, -80), game_state()),
+      DrawServerPacket(6, (True, False, True, False), (15, -15, 15, -15), game_state()),
+      GameStateDeltaServerPacket(
+          7,
+          (None, PlayerStruct(230, True), None, None),
+          GameCountersStruct(5, 1, 2, 2),
+      ),
+      HelloServerPacket(3, 15),
+      PingServerPacket(123456),
+      PongServerPacket(123456),
+      ResumeTokenServerPacket(bytes(range(8))),
+  ]
+
+  missing = packets - {type(packet) for packet in samples}
+  if missing:
+    raise ValueError(sorted(packet.__name__ for packet in missing))
+  return samples
+
+
+class Benchmark:
+  def __init__(self, name: str, size: int, setup):
+    self.name = name
+    self.size = size
+    self.setup = setup
+
+
+def pack_benchmark(packet: Packet):
+  def setup():
+    buffer = PacketBuffer()
+    return lambda: buffer.pack(packet)
+  return Benchmark(f'pack/{type(packet).__name__}', len(PacketBuffer().pack(packet)), setup)
+
+
+def unpack_benchmark(packet: Packet):
+  data = bytes(PacketBuffer().pack(packet))
+
+  def setup():
+    return lambda: unpack_packet(data, FRAME_HEADER_SIZE)
+  return Benchmark(f'unpack/{type(packet).__name__}', len(data), setup)
+
+
+def socket_benchmark(packet: Packet, sockets: tuple[socket.socket, socket.socket]):
+  send_socket, recv_socket = sockets
+
+  def setup():
+    buffer = PacketBuffer()
+
+    def run():
+      send_packet(send_socket, packet, buffer)
+      return read_packet(recv_socket)
+    return run
+  return Benchmark(f'socket/{type(packet).__name__}', len(PacketBuffer().pack(packet)), setup)
+
+
+def stream_benchmark(packet: Packet, sockets: tuple[socket.socket, socket.socket]):
+  send_socket, recv_socket = sockets
+
+  def setup():
+    writer = PacketWriter()
+    reader = PacketReader()
+
+    def run():
+      writer.write_packet(packet)
+      writer.flush(send_socket)
+      while True:
+        reader.read(recv_socket)
+        for received in reader.packets():
+          return received
+    return run
+  return Benchmark(f'stream/{type(packet).__name__}', len(PacketBuffer().pack(packet)), setup)
+
+
+def measure_time(run, duration: float):
+  iterations = 1
+  while True:
+    start = time.perf_counter()
+    for _ in range(iterations):
+      run()
+    elapsed = time.perf_counter() - start
+    if elapsed >= duration:
+      return iterations / elapsed
+    iterations *= 2 if elapsed < duration / 10 else max(2, int(duration / elapsed) + 1)
+
+
+def measure_allocations(run, iterations: int):
+  for _ in range(iterations):
+    run()
+
+  allocated = 0
+  blocks = 0
+  own = [tracemalloc.Filter(False, __file__)]
+  tracemalloc.start()
+  try:
+    for _ in range(iterations):
+      before = tracemalloc.take_snapshot().filter_traces(own)
+      start, _ = tracemalloc.get_traced_memory()
+      tracemalloc.reset_peak()
+      result = run()
+      _, peak = tracemalloc.get_traced_memory()
+      after = tracemalloc.take_snapshot().filter_traces(own)
+      del result
+      allocated += peak - start
+      blocks += sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+  finally:
+    tracemalloc.stop()
+
+  return allocated / iterations, blocks / iterations
+
+
+def run_benchmark(benchmark: Benchmark, duration: float, iterations: int) -> dict:
+  run = benchmark.setup()
+  ops = measure_time(run, duration)
+  alloc_bytes, alloc_blocks = measure_allocations(benchmark.setup(), iterations)
+  return {
+      'ops_per_sec': round(ops, 1),
+      'bytes_per_op': benchmark.size,
+      'alloc_bytes_per_op': round(alloc_bytes, 1),
+      'alloc_blocks_per_op': round(alloc_blocks, 2),
+  }
+
+
+def git_commit():
+  try:
+    return subprocess.check_output(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        stderr=subprocess.DEVNULL,
+    ).decode().strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def compare(results: dict, baseline: dict):
+  print(f'{"benchmark":48} {"ops/s":>12} {"change":>8} {"alloc B/op":>11} {"change":>8}')
+  for name, result in results.items():
+    old = baseline.get(name)
+    ops = result['ops_per_sec']
+    alloc = result['alloc_bytes_per_op']
+    if old is None:
+      print(f'{name:48} {ops:12.0f} {"new":>8} {alloc:11.1f} {"new":>8}')
+      continue
+
+    ops_change = (ops / old['ops_per_sec'] - 1) * 100
+    alloc_change = alloc - old['alloc_bytes_per_op']
+    print(f'{name:48} {ops:12.0f} {ops_change:+7.1f}% {alloc:11.1f} {alloc_change:+8.1f}')
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark the mahjong2040 wire protocol')
+  parser.add_argument('--duration', type=float, default=0.2, help='seconds to time each benchmark')
+  parser.add_argument('--iterations', type=int, default=200, help='operations traced per allocation run')
+  parser.add_argument('--filter', default='', help='only run benchmarks containing this text')
+  parser.add_argument('--output', help='write results to this JSON file')
+  parser.add_argument('--compare', help='compare against a previous JSON results file')
+  args = parser.parse_args()
+
+  sockets = socket.socketpair()
+  benchmarks: list[Benchmark] = []
+  for packet in sample_packets():
+    benchmarks.append(pack_benchmark(packet))
+    benchmarks.append(unpack_benchmark(packet))
+    benchmarks.append(socket_benchmark(packet, sockets))
+    benchmarks.append(stream_benchmark(packet, sockets))
+
+  results: dict[str, dict] = {}
+  for benchmark in benchmarks:
+    if args.filter not in benchmark.name:
+      continue
+    results[benchmark.name] = run_benchmark(benchmark, args.duration, args.iterations)
+    if not args.compare:
+      result = results[benchmark.name]
+      print(
+          f'{benchmark.name:48} {result["ops_per_sec"]:12.0f} ops/s '
+          f'{result["bytes_per_op"]:4d} B/op '
+          f'{result["alloc_bytes_per_op"]:8.1f} alloc B/op '
+          f'{result["alloc_blocks_per_op"]:6.2f} blocks/op'
+      )
+
+  for _socket in sockets:
+    _socket.close()
+
+  if args.compare:
+    with open(args.compare) as f:
+      compare(results, json.load(f)['results'])
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump({
+          'commit': git_commit(),
+          'python': platform.python_implementation() + ' ' + platform.python_version(),
+          'platform': platform.platform(),
+          'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+          'results': results,
+      }, f, indent=2)
+
+
+if __name__ == '__main__':
+  main()
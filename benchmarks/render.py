@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks.packets import git_commit, measure_allocations, measure_time
+
+FAKES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fakes')
+
+
+class Counter:
+  def __init__(self):
+    self.widgets = 0
+
+  def install(self, widget_class: type):
+    counter = self
+
+    def new(cls, *args, **kwargs):
+      counter.widgets += 1
+      return object.__new__(cls)
+    widget_class.__new__ = new
+
+
+class Scenario:
+  def __init__(self, name: str, build, frame=None):
+    self.name = name
+    self.build = build
+    self.frame = frame
+
+
+def game_state():
+  from mahjong2040.packets import PlayerStruct
+  from mahjong2040.shared import ClientGameState
+
+  return ClientGameState(
+      2,
+      (
+          PlayerStruct(250, False),
+          PlayerStruct(240, True),
+          PlayerStruct(-30, False),
+          PlayerStruct(540, True),
+      ),
+      250,
+      hand=5,
+      repeat=1,
+      bonus_honba=2,
+      bonus_riichi=1,
+  )
+
+
+def server_list(client):
+  from mahjong2040.client.states.server_list import ServerListClientState
+  from mahjong2040.packets import BroadcastServerPacket
+  from mahjong2040.shared import Phase
+
+  state = ServerListClientState(client, 1246)
+  for table in range(3):
+    state.on_broadcast_packet(
+        BroadcastServerPacket(seated=table + 1, phase=Phase.LOBBY, name=f'Hall {table + 1}', table=table),
+        ('192.168.1.20', 1246),
+    )
+  return state
+
+
+def lobby(client):
+  from mahjong2040.client.states.lobby import LobbyClientState
+  return LobbyClientState(client, (3, 4))
+
+
+def setup_player_wind(client):
+  from mahjong2040.client.states.setup_player_wind import SetupPlayerWindClientState
+  return SetupPlayerWindClientState(client, 2)
+
+
+def game(client):
+  from mahjong2040.client.states.game import GameClientState
+  return GameClientState(client, game_state())
+
+
+def toggle_riichi(client):
+  from mahjong2040.packets import GameStateDeltaServerPacket, PlayerStruct
+
+  player = client.game_state.players[1]
+  client.on_server_packet(GameStateDeltaServerPacket(
+      client.game_state_seq + 1,
+      (None, PlayerStruct(player.points, not player.riichi), None, None),
+      None,
+  ))
+  client.update()
+
+
+def game_relative(client):
+  client.settings.absolute_scores = False
+  return game(client)
+
+
+def game_menu(client):
+  from mahjong2040.client.states.game_menu import GameMenuClientState
+  return GameMenuClientState(client, game_state())
+
+
+def ron_wind(client):
+  from mahjong2040.client.states.game_ron_wind import GameRonWindClientState
+  return GameRonWindClientState(client, [wind for wind, _ in list(game_state().players_from_me)[1:]])
+
+
+def ron_score(client):
+  from mahjong2040.client.states.game_ron_score import GameRonScoreClientState
+  return GameRonScoreClientState(client, 1, False)
+
+
+def tsumo_score(client):
+  from mahjong2040.client.states.game_tsumo_score import GameTsumoScoreClientState
+  return GameTsumoScoreClientState(client)
+
+
+def draw(client):
+  from mahjong2040.client.states.game_draw import GameDrawClientState
+  from mahjong2040.shared import Tenpai
+  return GameDrawClientState(client, Tenpai.UNKNOWN)
+
+
+def tsumo_result(client):
+  from mahjong2040.client.states.game_tsumo_result import TsumoResultClientState
+  from mahjong2040.packets import TsumoServerPacket
+  return TsumoResultClientState(client, TsumoServerPacket(1, 5, (-40, 120, -40, -40), game_state()))
+
+
+def ron_result(client):
+  from mahjong2040.client.states.game_ron_result import RonResultClientState
+  from mahjong2040.packets import RonServerPacket
+  return RonResultClientState(client, RonServerPacket(2, 5, (0, 0, 80, -80), game_state()))
+
+
+def draw_result(client):
+  from mahjong2040.client.states.game_draw_result import DrawResultClientState
+  from mahjong2040.packets import DrawServerPacket
+  return DrawResultClientState(client, DrawServerPacket(6, (True, False, True, False), (15, -15, 15, -15), game_state()))
+
+
+SCENARIOS = [
+    Scenario('server_list', server_list),
+    Scenario('lobby', lobby),
+    Scenario('setup_player_wind', setup_player_wind),
+    Scenario('game', game),
+    Scenario('game_riichi', game, toggle_riichi),
+    Scenario('game_relative', game_relative),
+    Scenario('game_menu', game_menu),
+    Scenario('ron_wind', ron_wind),
+    Scenario('ron_score', ron_score),
+    Scenario('tsumo_score', tsumo_score),
+    Scenario('draw', draw),
+    Scenario('tsumo_result', tsumo_result),
+    Scenario('ron_result', ron_result),
+    Scenario('draw_result', draw_result),
+]
+
+
+def create_client(scenario: Scenario):
+  from mahjong2040 import config
+  from mahjong2040.client import Client
+
+  client = Client(config.create_poll())
+  client.game_state = game_state()
+  client.child = scenario.build(client)
+  return client
+
+
+def redraw(client):
+  client.dirty = True
+  client.update()
+
+
+def run_scenario(scenario: Scenario, counter: Counter, duration: float, iterations: int) -> dict:
+  client = create_client(scenario)
+  frame = scenario.frame or redraw
+  try:
+    redraw(client)
+    display = client.display
+    display.reset()
+    counter.widgets = 0
+    frame(client)
+    measures = display.counts.get('measure_text', 0)
+    draws = display.draw_calls()
+    widgets = counter.widgets
+    refresh_ms = display.refresh_ms
+
+    fps = measure_time(lambda: frame(client), duration)
+    alloc_bytes, alloc_blocks = measure_allocations(lambda: frame(client), iterations)
+  finally:
+    client.close()
+    client.poll.close()
+
+  return {
+      'frames_per_sec': round(fps, 1),
+      'ms_per_frame': round(1000 / fps, 3),
+      'widgets_per_frame': widgets,
+      'measure_text_per_frame': measures,
+      'draw_calls_per_frame': draws,
+      'refresh_ms_per_frame': round(refresh_ms, 1),
+      'alloc_bytes_per_frame': round(alloc_bytes, 1),
+      'alloc_blocks_per_frame': round(alloc_blocks, 2),
+  }
+
+
+def compare(results: dict, baseline: dict):
+  print(f'{"state":20} {"ms/frame":>9} {"change":>8} {"widgets":>8} {"change":>7} {"measure":>8} {"change":>7} {"draws":>6} {"change":>7}')
+  for name, result in results.items():
+    old = baseline.get(name)
+    ms = result['ms_per_frame']
+    widgets = result['widgets_per_frame']
+    measure = result['measure_text_per_frame']
+    draws = result['draw_calls_per_frame']
+    if old is None:
+      print(f'{name:20} {ms:9.3f} {"new":>8} {widgets:8d} {"new":>7} {measure:8d} {"new":>7} {draws:6d} {"new":>7}')
+      continue
+
+    ms_change = (ms / old['ms_per_frame'] - 1) * 100
+    print(
+        f'{name:20} {ms:9.3f} {ms_change:+7.1f}% '
+        f'{widgets:8d} {widgets - old["widgets_per_frame"]:+7d} '
+        f'{measure:8d} {measure - old["measure_text_per_frame"]:+7d} '
+        f'{draws:6d} {draws - old["draw_calls_per_frame"]:+7d}'
+    )
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark rendering each mahjong2040 client state')
+  parser.add_argument('--badger-ui', help='directory containing the badger_ui package')
+  parser.add_argument('--duration', type=float, default=0.2, help='seconds to time each state')
+  parser.add_argument('--iterations', type=int, default=50, help='frames traced per allocation run')
+  parser.add_argument('--filter', default='', help='only run states containing this text')
+  parser.add_argument('--output', help='write results to this JSON file')
+  parser.add_argument('--compare', help='compare against a previous JSON results file')
+  args = parser.parse_args()
+
+  sys.path.insert(0, FAKES)
+  if args.badger_ui:
+    sys.path.insert(0, args.badger_ui)
+  try:
+    from badger_ui.base import Widget
+  except ImportError:
+    parser.error('badger_ui is not importable; pass --badger-ui or add it to PYTHONPATH')
+
+  counter = Counter()
+  counter.install(Widget)
+
+  results: dict[str, dict] = {}
+  for scenario in SCENARIOS:
+    if args.filter not in scenario.name:
+      continue
+    results[scenario.name] = run_scenario(scenario, counter, args.duration, args.iterations)
+    if not args.compare:
+      result = results[scenario.name]
+      print(
+          f'{scenario.name:20} {result["ms_per_frame"]:8.3f} ms/frame '
+          f'{result["widgets_per_frame"]:4d} widgets '
+          f'{result["measure_text_per_frame"]:4d} measure_text '
+          f'{result["draw_calls_per_frame"]:4d} draws '
+          f'{result["refresh_ms_per_frame"]:7.1f} refresh ms '
+          f'{result["alloc_bytes_per_frame"]:9.1f} alloc B/frame'
+      )
+
+  if args.compare:
+    with open(args.compare) as f:
+      compare(results, json.load(f)['results'])
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump({
+          'commit': git_commit(),
+          'python': platform.python_implementation() + ' ' + platform.python_version(),
+          'platform': platform.platform(),
+          'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+          'results': results,
+      }, f, indent=2)
+
+
+if __name__ == '__main__':
+  main()
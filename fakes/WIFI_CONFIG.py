@@ -0,0 +1,3 @@
+SSID = 'fake'
+PSK = ''
+COUNTRY = 'GB'
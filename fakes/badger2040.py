@@ -0,0 +1,232 @@
+import time
+
+WIDTH = 296
+HEIGHT = 128
+
+BUTTON_DOWN = 11
+BUTTON_A = 12
+BUTTON_B = 13
+BUTTON_C = 14
+BUTTON_UP = 15
+BUTTON_MASK = 0b11111 << 11
+
+SYSTEM_VERY_SLOW = 0
+SYSTEM_SLOW = 1
+SYSTEM_NORMAL = 2
+SYSTEM_FAST = 3
+SYSTEM_TURBO = 4
+
+UPDATE_NORMAL = 0
+UPDATE_MEDIUM = 1
+UPDATE_FAST = 2
+UPDATE_TURBO = 3
+
+UPDATE_MS = {
+    UPDATE_NORMAL: 2000,
+    UPDATE_MEDIUM: 1000,
+    UPDATE_FAST: 500,
+    UPDATE_TURBO: 250,
+}
+
+LED = 22
+ENABLE_3V3 = 10
+BUSY = 26
+
+FONT_WIDTHS = {
+    'bitmap6': 6,
+    'bitmap8': 6,
+    'bitmap14_outline': 10,
+    'sans': 19,
+    'gothic': 19,
+    'cursive': 17,
+    'serif': 20,
+    'serif_italic': 19,
+}
+FONT_HEIGHT = {
+    'bitmap6': 6,
+    'bitmap8': 8,
+    'bitmap14_outline': 14,
+}
+HERSHEY_HEIGHT = 32
+DRAW_CALLS = ('pixel', 'line', 'rectangle', 'triangle', 'circle', 'polygon', 'text', 'glyph', 'image')
+
+pressed_buttons: set[int] = set()
+realtime = False
+
+
+def press(*buttons: int):
+  pressed_buttons.clear()
+  pressed_buttons.update(buttons)
+
+
+def release():
+  pressed_buttons.clear()
+
+
+def system_speed(speed: int):
+  pass
+
+
+def woken_by_button():
+  return False
+
+
+def woken_by_rtc():
+  return False
+
+
+def pressed_to_wake(button: int):
+  return False
+
+
+def reset_pressed_to_wake():
+  pass
+
+
+def sleep_for(minutes: int):
+  pass
+
+
+class Refresh:
+  def __init__(self, x: int, y: int, width: int, height: int, speed: int, ms: float):
+    self.x = x
+    self.y = y
+    self.width = width
+    self.height = height
+    self.speed = speed
+    self.ms = ms
+
+  def __repr__(self):
+    return f'{self.__class__.__name__}({self.x}, {self.y}, {self.width}, {self.height}, speed={self.speed}, ms={self.ms:.1f})'
+
+
+class Badger2040:
+  def __init__(self):
+    self.pen = 0
+    self.font = 'bitmap8'
+    self.thickness = 1
+    self.update_speed = UPDATE_NORMAL
+    self.brightness = 0
+    self.inverted = False
+    self.clip: tuple[int, int, int, int] | None = None
+    self.calls: list[tuple] = []
+    self.counts: dict[str, int] = {}
+    self.refreshes: list[Refresh] = []
+    self.refresh_ms = 0.0
+
+  def record(self, name: str, *args):
+    self.calls.append((name,) + args)
+    self.counts[name] = self.counts.get(name, 0) + 1
+
+  def draw_calls(self):
+    return sum(self.counts.get(name, 0) for name in DRAW_CALLS)
+
+  def reset(self):
+    self.calls = []
+    self.counts = {}
+    self.refreshes = []
+    self.refresh_ms = 0.0
+
+  def led(self, brightness: int):
+    self.brightness = brightness
+
+  def invert(self, inverted: bool):
+    self.inverted = inverted
+
+  def set_update_speed(self, speed: int):
+    if speed not in UPDATE_MS:
+      raise ValueError('update speed not in range')
+    self.update_speed = speed
+
+  def set_pen(self, pen: int):
+    self.pen = max(0, min(15, pen))
+
+  def set_font(self, font: str):
+    self.font = font
+
+  def set_thickness(self, thickness: int):
+    self.thickness = thickness
+
+  def set_clip(self, x: int, y: int, width: int, height: int):
+    self.clip = (x, y, width, height)
+
+  def remove_clip(self):
+    self.clip = None
+
+  def clear(self):
+    self.record('clear', self.pen)
+
+  def pixel(self, x: int, y: int):
+    self.record('pixel', self.pen, x, y)
+
+  def line(self, x1: int, y1: int, x2: int, y2: int, thickness=1):
+    self.record('line', self.pen, x1, y1, x2, y2, thickness)
+
+  def rectangle(self, x: int, y: int, width: int, height: int):
+    self.record('rectangle', self.pen, x, y, width, height)
+
+  def triangle(self, x1: int, y1: int, x2: int, y2: int, x3: int, y3: int):
+    self.record('triangle', self.pen, x1, y1, x2, y2, x3, y3)
+
+  def circle(self, x: int, y: int, radius: int):
+    self.record('circle', self.pen, x, y, radius)
+
+  def polygon(self, points: list[tuple[int, int]]):
+    self.record('polygon', self.pen, tuple(points))
+
+  def text(self, text: str, x: int, y: int, wordwrap=WIDTH, scale=2.0, angle=0, spacing=1):
+    self.record('text', self.pen, text, x, y, self.font, scale)
+
+  def glyph(self, char: int, x: int, y: int, scale=2.0, angle=0):
+    self.record('glyph', self.pen, char, x, y, self.font, scale)
+
+  def image(self, data: bytes, width: int, height: int, x: int, y: int):
+    self.record('image', self.pen, x, y, width, height)
+
+  def measure_text(self, text: str, scale=2.0, spacing=1, fixed_width=False):
+    self.record('measure_text', text, self.font, scale)
+    width = FONT_WIDTHS.get(self.font, FONT_WIDTHS['bitmap8'])
+    if self.font in FONT_HEIGHT:
+      return int(len(text) * (width + spacing - 1) * scale)
+    return int(len(text) * width * scale)
+
+  def measure_glyph(self, char: int, scale=2.0):
+    return self.measure_text(chr(char), scale)
+
+  def refresh(self, x: int, y: int, width: int, height: int):
+    ms = UPDATE_MS[self.update_speed] * (width * height) / (WIDTH * HEIGHT)
+    self.refreshes.append(Refresh(x, y, width, height, self.update_speed, ms))
+    self.refresh_ms += ms
+    self.record('update', x, y, width, height)
+    if realtime:
+      time.sleep(ms / 1000)
+
+  def update(self):
+    self.refresh(0, 0, WIDTH, HEIGHT)
+
+  def partial_update(self, x: int, y: int, width: int, height: int):
+    if y % 8 or height % 8:
+      raise ValueError('y and height must be multiples of 8')
+    if x < 0 or y < 0 or width <= 0 or height <= 0 or x + width > WIDTH or y + height > HEIGHT:
+      raise ValueError('region out of range')
+    self.refresh(x, y, width, height)
+
+  def pressed(self, button: int):
+    return button in pressed_buttons
+
+  def pressed_any(self):
+    return bool(pressed_buttons)
+
+  def halt(self):
+    pass
+
+  def keepalive(self):
+    pass
+
+  def isconnected(self):
+    import network
+    return network.WLAN(network.STA_IF).isconnected()
+
+  def ip_address(self):
+    import network
+    return network.WLAN(network.STA_IF).ifconfig()[0]
@@ -0,0 +1,88 @@
+import threading
+
+
+def freq(hz: int | None = None):
+  return 125_000_000
+
+
+def unique_id():
+  return b'\xe6\x61\x48\x64\xd3\x0b\x7b\x36'
+
+
+def reset():
+  raise SystemExit()
+
+
+def lightsleep(ms: int | None = None):
+  pass
+
+
+def deepsleep(ms: int | None = None):
+  raise SystemExit()
+
+
+class Pin:
+  IN = 0
+  OUT = 1
+  PULL_UP = 1
+  PULL_DOWN = 2
+  IRQ_RISING = 4
+  IRQ_FALLING = 8
+
+  def __init__(self, id: int, mode=IN, pull=None, value=0):
+    self.id = id
+    self._value = value
+
+  def value(self, value: int | None = None):
+    if value is None:
+      return self._value
+    self._value = value
+
+  def on(self):
+    self._value = 1
+
+  def off(self):
+    self._value = 0
+
+  def irq(self, handler=None, trigger=IRQ_RISING):
+    pass
+
+
+class Timer:
+  ONE_SHOT = 0
+  PERIODIC = 1
+
+  def __init__(self, id=-1, mode=PERIODIC, period=-1, callback=None, freq=None):
+    self.thread: threading.Timer | None = None
+    if callback is not None:
+      self.init(mode=mode, period=period, callback=callback, freq=freq)
+
+  def init(self, mode=PERIODIC, period=-1, callback=None, freq=None):
+    self.deinit()
+    if freq is not None:
+      period = 1000 / freq
+    self.mode = mode
+    self.period = max(0, period)
+    self.callback = callback
+    self.schedule()
+
+  def schedule(self):
+    self.thread = threading.Timer(self.period / 1000, self.fire)
+    self.thread.daemon = True
+    self.thread.start()
+
+  def fire(self):
+    if self.thread is None:
+      return
+
+    if self.mode == Timer.PERIODIC:
+      self.schedule()
+    else:
+      self.thread = None
+    if self.callback is not None:
+      self.callback(self)
+
+  def deinit(self):
+    if self.thread is not None:
+      self.thread.cancel()
+      self.thread = None
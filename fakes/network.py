@@ -0,0 +1,55 @@
+import socket
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+address: str | None = None
+
+
+def host_address():
+  if address is not None:
+    return address
+
+  probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+  try:
+    probe.connect(('10.255.255.255', 1))
+    return probe.getsockname()[0]
+  except OSError:
+    return '127.0.0.1'
+  finally:
+    probe.close()
+
+
+class WLAN:
+  def __init__(self, interface=STA_IF):
+    self.interface = interface
+
+  def active(self, active: bool | None = None):
+    return True
+
+  def connect(self, ssid: str | None = None, key: str | None = None, **kwargs):
+    pass
+
+  def disconnect(self):
+    pass
+
+  def isconnected(self):
+    return True
+
+  def status(self, param: str | None = None):
+    return STAT_GOT_IP
+
+  def ifconfig(self, config: tuple | None = None):
+    ip = host_address()
+    gateway = '.'.join(ip.split('.')[:3] + ['1'])
+    return (ip, '255.255.255.0', gateway, gateway)
+
+  def config(self, *args, **kwargs):
+    return None
@@ -0,0 +1,47 @@
+import network
+
+
+class NetworkManager:
+  _ifname = ('Client', 'Access Point')
+
+  def __init__(self, country='GB', client_timeout=60, access_point_timeout=5, status_handler=None, error_handler=None):
+    self._country = country
+    self._client_timeout = client_timeout
+    self._access_point_timeout = access_point_timeout
+    self._status_handler = status_handler
+    self._error_handler = error_handler
+    self._sta_if = network.WLAN(network.STA_IF)
+    self._ap_if = network.WLAN(network.AP_IF)
+
+  def isconnected(self):
+    return self._sta_if.isconnected()
+
+  def config(self, var: str):
+    return None
+
+  def mode(self):
+    return self._ifname[0]
+
+  def ip_address(self):
+    return self._sta_if.ifconfig()[0]
+
+  def ifaddress(self):
+    return self.ip_address()
+
+  def disconnect(self):
+    self._sta_if.disconnect()
+
+  async def wait(self, mode: int):
+    pass
+
+  def _handle_status(self, mode: str, status: bool | None):
+    if self._status_handler is not None:
+      self._status_handler(mode, status, self.ip_address())
+
+  async def client(self, ssid: str, psk: str):
+    self._handle_status(self._ifname[0], None)
+    self._sta_if.connect(ssid, psk)
+    self._handle_status(self._ifname[0], True)
+
+  async def access_point(self):
+    self._handle_status(self._ifname[1], True)
@@ -0,0 +1,134 @@
+import select
+from typing import Any, Callable
+
+from .poll import INPUT_POLL_INTERVAL, EventCallback, ticks_diff, ticks_ms
+
+try:
+  import asyncio
+except ImportError:
+  import uasyncio as asyncio
+
+
+def sleep_ms(delay: int):
+  if hasattr(asyncio, 'sleep_ms'):
+    return asyncio.sleep_ms(delay)
+  return asyncio.sleep(delay / 1000)
+
+
+class TaskHandle:
+  def __init__(self, task):
+    self.task = task
+
+  def cancel(self):
+    self.task.cancel()
+
+
+class AsyncPoll:
+  def __init__(self):
+    self.lookup: dict[int, EventCallback] = {}
+    self.masks: dict[int, int] = {}
+    self.watchers: dict[int, list] = {}
+    self.loop = asyncio.get_event_loop()
+    self.native = hasattr(self.loop, 'add_reader')
+    self.tick = ticks_ms()
+    self.busy_ms = 0
+
+  @property
+  def idle_ms(self):
+    return ticks_diff(ticks_ms(), self.tick) - self.busy_ms
+
+  def reset_stats(self):
+    self.tick = ticks_ms()
+    self.busy_ms = 0
+
+  def register(self, fd: Any, eventmask: int, callback: Callable[[Any, int], None]):
+    self.lookup[id(fd)] = EventCallback(fd, callback)
+    self.watch(fd, eventmask)
+
+  def modify(self, fd: Any, eventmask: int):
+    self.unwatch(fd)
+    self.watch(fd, eventmask)
+
+  def unregister(self, fd: Any):
+    self.unwatch(fd)
+    del self.lookup[id(fd)]
+
+  def watch(self, fd: Any, eventmask: int):
+    key = id(fd)
+    self.masks[key] = eventmask
+    if self.native:
+      if eventmask & select.POLLIN:
+        self.loop.add_reader(fd, self.dispatch, key, select.POLLIN)
+      if eventmask & select.POLLOUT:
+        self.loop.add_writer(fd, self.dispatch, key, select.POLLOUT)
+      return
+
+    self.watchers[key] = [
+        asyncio.create_task(self.wait(fd, key, event))
+        for event in (select.POLLIN, select.POLLOUT)
+        if eventmask & event
+    ]
+
+  def unwatch(self, fd: Any):
+    key = id(fd)
+    eventmask = self.masks.pop(key, 0)
+    if self.native:
+      if eventmask & select.POLLIN:
+        self.loop.remove_reader(fd)
+      if eventmask & select.POLLOUT:
+        self.loop.remove_writer(fd)
+      return
+
+    for task in self.watchers.pop(key, ()):
+      task.cancel()
+
+  async def wait(self, fd: Any, key: int, event: int):
+    io_queue = asyncio.core._io_queue
+    while self.masks.get(key, 0) & event:
+      if event == select.POLLOUT:
+        yield io_queue.queue_write(fd)
+      else:
+        yield io_queue.queue_read(fd)
+      self.dispatch(key, event)
+
+  def dispatch(self, key: int, event: int):
+    event_callback = self.lookup.get(key)
+    if event_callback:
+      self.run_callback(event_callback, (event,))
+
+  def run_callback(self, callback: Callable, args: tuple):
+    start = ticks_ms()
+    try:
+      callback(*args)
+    finally:
+      self.busy_ms += ticks_diff(ticks_ms(), start)
+
+  def poll(self, timeout=0):
+    pass
+
+  def call_soon(self, callback: Callable, *args):
+    if self.native:
+      return self.loop.call_soon(self.run_callback, callback, args)
+    return self.call_later(0, callback, *args)
+
+  def call_later(self, delay: int, callback: Callable, *args):
+    if self.native:
+      return self.loop.call_later(delay / 1000, self.run_callback, callback, args)
+    return TaskHandle(asyncio.create_task(self.later(delay, callback, args)))
+
+  async def later(self, delay: int, callback: Callable, args: tuple):
+    await sleep_ms(delay)
+    self.run_callback(callback, args)
+
+  def close(self):
+    for event_callback in list(self.lookup.values()):
+      self.unregister(event_callback.fd)
+
+
+async def run(app_runner, interval=INPUT_POLL_INTERVAL, tasks=()):
+  for task in tasks:
+    asyncio.create_task(task)
+
+  while True:
+    app_runner.update()
+    await sleep_ms(0 if app_runner.app.dirty else interval)
@@ -1,4 +1,5 @@
 import gc
+import time
 
 import network
 import uasyncio
@@ -13,7 +14,7 @@ import WIFI_CONFIG
 from mahjong2040 import config
 from mahjong2040.packets import GameStateStruct
 
-from .poll import Poll
+from .poll import INPUT_POLL_INTERVAL
 
 
 def isconnected():
@@ -30,6 +31,7 @@ class MyApp(App):
 
     self.port = port
     self.child = ConnectingScreen()
+    self.tasks = []
 
   def init(self):
     self.connect()
@@ -46,9 +48,18 @@ class MyApp(App):
       raise RuntimeError("You must populate WIFI_CONFIG.py for networking.")
 
     network_manager = NetworkManager(WIFI_CONFIG.COUNTRY, status_handler=self.status_handler)
+    if config.transport == config.Transport.ASYNCIO:
+      self.tasks.append(network_manager.client(WIFI_CONFIG.SSID, WIFI_CONFIG.PSK))
+      return
+
     uasyncio.get_event_loop().run_until_complete(network_manager.client(WIFI_CONFIG.SSID, WIFI_CONFIG.PSK))
     gc.collect()
 
+  def update(self):
+    if not self.dirty and config.transport != config.Transport.ASYNCIO:
+      time.sleep(INPUT_POLL_INTERVAL / 1000)
+    return super().update()
+
   def render(self, app: 'App', size: Size, offset: Offset):
     return super().render(app, size, offset)
 
@@ -91,9 +102,9 @@ class SelectScreen(Widget):
   def open_client(self):
     from .client import Client
 
-    poll = Poll()
+    poll = config.create_poll()
     client = Client(poll)
-    client.broadcast(self.port)
+    client.broadcast(self.port, config.discovery_group())
     app_runner.app = client
 
   def open_server(self):
@@ -108,9 +119,9 @@ class SelectScreen(Widget):
       print(e)
       game_state = None
 
-    poll = Poll()
-    server = Server(poll, game_state)
-    server.start(self.port)
+    poll = config.create_poll()
+    server = Server(poll, game_state, config.name, config.heartbeat_interval, config.heartbeat_misses)
+    server.start(self.port, config.discovery_group(), config.multicast_ttl)
     client = Client(poll)
     client.connect(LocalClientServer(client, server))
     app_runner.app = client
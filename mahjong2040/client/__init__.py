@@ -2,24 +2,63 @@ import select
 import socket
 import typing
 
-from badger_ui import App
-from mahjong2040.packets import Packet, read_packet, read_packet_from, send_packet
-from mahjong2040.poll import Poll
-from mahjong2040.shared import Address
-
-from .shared import ClientSettings
+from badger_ui import App, Offset, Size
+
+import badger2040
+from mahjong2040.packets import (
+    BEACON_PORT_OFFSET,
+    CAP_DELTA,
+    CAP_HEARTBEAT,
+    CAPABILITIES,
+    DECODE_ERRORS,
+    HEARTBEAT_INTERVAL,
+    HEARTBEAT_MISSES,
+    PROTOCOL_VERSION,
+    RESUME_TOKEN_SIZE,
+    SO_BROADCAST,
+    GameStateDeltaServerPacket,
+    GameStatePacket,
+    GameStateRequestClientPacket,
+    GameStateServerPacket,
+    HelloClientPacket,
+    HelloServerPacket,
+    JoinTableClientPacket,
+    Packet,
+    PacketReader,
+    PacketWriter,
+    PingClientPacket,
+    PingServerPacket,
+    PongClientPacket,
+    PongServerPacket,
+    QueueFullError,
+    ResumeClientPacket,
+    ResumeTokenServerPacket,
+    join_multicast,
+    read_packet_from,
+)
+from mahjong2040.poll import INPUT_POLL_INTERVAL, Poll, TimerHandle, ticks_diff, ticks_ms
+from mahjong2040.shared import Address, ClientGameState
+
+from .shared import ClientSettings, align_region, merge_regions, region_area
 
 if typing.TYPE_CHECKING:
   from mahjong2040.server import Server
 
   from .states.base import ClientState
 
+RESUME_TOKEN_PATH = '/resume.bin'
+RECONNECT_DELAY = 2000
+FULL_REFRESH_INTERVAL = 8
+PARTIAL_AREA_LIMIT = 0.5
+
 
 class ServerDisconnectedError(Exception):
   pass
 
 
 class ClientServer:
+  capabilities = 0
+
   def connect(self):
     pass
 
@@ -33,10 +72,30 @@ class ClientServer:
 class RemoteClientServer(ClientServer):
   socket: 'socket.socket'
 
-  def __init__(self, client: 'Client', poll: Poll, address: Address):
+  def __init__(
+      self,
+      client: 'Client',
+      poll: Poll,
+      address: Address,
+      version=0,
+      heartbeat_interval=HEARTBEAT_INTERVAL,
+      heartbeat_misses=HEARTBEAT_MISSES,
+      table=0,
+  ):
     self.client: 'Client' = client
     self.poll = poll
     self.address = address
+    self.version = version
+    self.heartbeat_interval = heartbeat_interval
+    self.heartbeat_misses = heartbeat_misses
+    self.table = table
+    self.heartbeat_timer: TimerHandle | None = None
+    self.last_seen = ticks_ms()
+    self.rtt: int | None = None
+    self.reader = PacketReader()
+    self.writer = PacketWriter()
+    self.waiting = False
+    self.flushing = False
 
   def connect(self):
     host, port = self.address
@@ -47,40 +106,116 @@ class RemoteClientServer(ClientServer):
 
     print(f'Client connecting to {addrinfo}')
     self.socket.connect(addrinfo)
+    self.socket.setblocking(False)
+
+    if self.version:
+      self.send_packet(HelloClientPacket(PROTOCOL_VERSION, CAPABILITIES))
+    if self.version >= 2 and self.client.resume_token is not None:
+      self.send_packet(ResumeClientPacket(self.client.resume_token))
+    if self.version >= 3:
+      self.send_packet(JoinTableClientPacket(self.table))
 
   def on_server_data(self, server: 'socket.socket', event: int):
     if event & (select.POLLHUP | select.POLLERR | 32):
-      self.on_server_disconnect(server)
-    elif event & select.POLLIN:
-      packet = read_packet(self.socket)
-      if packet is not None:
-        print(self.__class__.__name__, repr(packet))
-        self.client.on_server_packet(packet)
-      else:
+      return self.on_server_disconnect(server)
+
+    if event & select.POLLOUT:
+      self.flush()
+      if not hasattr(self, 'socket'):
+        return
+
+    if event & select.POLLIN:
+      if not self.reader.read(server):
+        return self.on_server_disconnect(server)
+      self.last_seen = ticks_ms()
+
+      try:
+        for packet in self.reader.packets():
+          print(self.__class__.__name__, repr(packet))
+          if isinstance(packet, HelloServerPacket):
+            self.on_hello(packet)
+          elif isinstance(packet, PingServerPacket):
+            self.send_packet(PongClientPacket(packet.stamp))
+          elif isinstance(packet, PongServerPacket):
+            self.rtt = ticks_diff(ticks_ms(), packet.stamp)
+          elif isinstance(packet, ResumeTokenServerPacket):
+            self.client.save_resume_token(packet.token)
+          else:
+            self.client.on_server_packet(packet)
+      except DECODE_ERRORS as e:
+        print(self.__class__.__name__, 'bad packet', repr(e))
         self.on_server_disconnect(server)
-    else:
-      print(event)
+
+  def on_hello(self, packet: HelloServerPacket):
+    self.capabilities = packet.capabilities
+    if self.capabilities & CAP_HEARTBEAT and self.heartbeat_timer is None:
+      self.last_seen = ticks_ms()
+      self.heartbeat_timer = self.poll.call_later(self.heartbeat_interval, self.heartbeat)
+
+  def heartbeat(self):
+    self.heartbeat_timer = None
+    if not hasattr(self, 'socket'):
+      return
+
+    now = ticks_ms()
+    if ticks_diff(now, self.last_seen) > self.heartbeat_interval * self.heartbeat_misses:
+      print(self.__class__.__name__, 'heartbeat timeout')
+      return self.on_server_disconnect(self.socket)
+
+    self.send_packet(PingClientPacket(now))
+    self.heartbeat_timer = self.poll.call_later(self.heartbeat_interval, self.heartbeat)
 
   def on_server_disconnect(self, server: 'socket.socket'):
     self.dirty = 2
-    self.poll.unregister(server)
-    server.close()
+    self.close()
 
-    raise ServerDisconnectedError()
+    if self.client.resume_token is None:
+      raise ServerDisconnectedError()
+    self.poll.call_later(RECONNECT_DELAY, self.client.reconnect, self)
 
   def send_packet(self, packet: Packet):
-    send_packet(self.socket, packet)
+    try:
+      self.writer.write_packet(packet)
+    except QueueFullError:
+      print(self.__class__.__name__, 'queue full')
+      return self.on_server_disconnect(self.socket)
+
+    if not self.flushing:
+      self.flushing = True
+      self.poll.call_soon(self.flush)
+
+  def flush(self):
+    self.flushing = False
+    if not hasattr(self, 'socket'):
+      return
+
+    try:
+      waiting = not self.writer.flush(self.socket)
+    except OSError as e:
+      print(self.__class__.__name__, e)
+      return self.on_server_disconnect(self.socket)
+
+    if waiting != self.waiting:
+      self.waiting = waiting
+      self.poll.modify(self.socket, (select.POLLIN | select.POLLOUT) if waiting else select.POLLIN)
 
   def close(self):
+    if self.heartbeat_timer is not None:
+      self.heartbeat_timer.cancel()
+      self.heartbeat_timer = None
+
     if not hasattr(self, 'socket'):
       return
 
+    self.poll.unregister(self.socket)
     self.socket.close()
     delattr(self, 'socket')
 
 
 class LocalClientServer(ClientServer):
-  def __init__(self, client: 'Client', server: Server):
+  capabilities = CAP_DELTA
+
+  def __init__(self, client: 'Client', server: 'Server'):
     from mahjong2040.server.shared import LocalServerClient
     self.client = LocalServerClient(client)
     self.server = server
@@ -105,27 +240,35 @@ class Client(App):
     self.server: ClientServer | None = None
     self.events: list[Packet] = []
     self.settings = ClientSettings(absolute_scores=True)
+    self.game_state: ClientGameState | None = None
+    self.game_state_seq: int | None = 0
+    self.resume_token = self.load_resume_token()
+    self.partial_updates = 0
 
   @property
   def child(self):
     return self._child
 
   @child.setter
-  def child(self, value: ClientState):
+  def child(self, value: 'ClientState'):
     if self._child is value:
       return
 
     self._child = value
     self._child.init()
 
-  def broadcast(self, port: int):
+  def broadcast(self, port: int, multicast_group: str | None = None):
     from .states.server_list import ServerListClientState
 
     self.close()
 
     self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    self.socket.setsockopt(socket.SOL_SOCKET, 32, 1)
+    self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    self.socket.setsockopt(socket.SOL_SOCKET, SO_BROADCAST, 1)
     self.poll.register(self.socket, select.POLLIN, self.on_broadcast_data)
+    self.socket.bind(('', port + BEACON_PORT_OFFSET))
+    if multicast_group:
+      join_multicast(self.socket, multicast_group)
 
     self.child = ServerListClientState(self, port)
 
@@ -145,10 +288,29 @@ class Client(App):
     self.close()
 
     self.server = server
+    self.game_state = None
     self.child = LobbyClientState(self)
 
     self.server.connect()
 
+  def reconnect(self, server: RemoteClientServer):
+    if self.server is not server:
+      return
+
+    try:
+      self.connect(RemoteClientServer(
+          self,
+          self.poll,
+          server.address,
+          server.version,
+          server.heartbeat_interval,
+          server.heartbeat_misses,
+          server.table,
+      ))
+    except OSError as e:
+      print(e)
+      self.poll.call_later(RECONNECT_DELAY, self.reconnect, self.server)
+
   def close(self):
     if self.socket is not None:
       self.poll.unregister(self.socket)
@@ -159,6 +321,28 @@ class Client(App):
       self.server.close()
       self.server = None
 
+  def load_resume_token(self) -> bytes | None:
+    try:
+      with open(RESUME_TOKEN_PATH, 'rb') as f:
+        token = f.read()
+    except OSError:
+      return None
+
+    if len(token) != RESUME_TOKEN_SIZE:
+      return None
+    return token
+
+  def save_resume_token(self, token: bytes):
+    if token == self.resume_token:
+      return
+
+    self.resume_token = token
+    try:
+      with open(RESUME_TOKEN_PATH, 'wb') as f:
+        f.write(token)
+    except OSError as e:
+      print(e)
+
   def on_server_packet(self, packet: Packet):
     self.events.append(packet)
 
@@ -166,9 +350,74 @@ class Client(App):
     if self.server:
       self.server.send_packet(packet)
 
+  def sync_game_state(self, packet: Packet):
+    if isinstance(packet, GameStatePacket):
+      self.game_state = packet.game_state
+      self.game_state_seq = None
+    elif isinstance(packet, GameStateDeltaServerPacket):
+      if self.game_state is None or self.game_state_seq is not None and packet.seq != self.game_state_seq + 1:
+        self.send_packet(GameStateRequestClientPacket())
+        return None
+
+      self.game_state = packet.apply(self.game_state)
+      self.game_state_seq = packet.seq
+      return GameStateServerPacket(self.game_state)
+
+    return packet
+
   def update(self):
-    self.poll.poll()
+    self.poll.poll(0 if self.dirty or self.events else INPUT_POLL_INTERVAL)
     while self.events and self.child:
-      dirty = self.child.on_server_packet(self.events.pop(0))
+      packet = self.sync_game_state(self.events.pop(0))
+      if packet is None:
+        continue
+
+      dirty = self.child.on_server_packet(packet)
       self.dirty = dirty or self.dirty
+
+    if not self.dirty and self.child and self.child.changed:
+      self.refresh_changed()
+    if self.dirty:
+      self.partial_updates = 0
+      if self.child:
+        self.child.changed.clear()
     return super().update()
+
+  def refresh_changed(self):
+    child = self.child
+    changed = child.changed
+    child.changed = set()
+    if self.partial_updates >= FULL_REFRESH_INTERVAL:
+      child.first_render = True
+      self.dirty = True
+      return
+
+    width = badger2040.WIDTH
+    height = badger2040.HEIGHT
+    size = Size(width, height)
+    previous = dict(child.bounds)
+    self.display.set_clip(0, 0, 0, 0)
+    self.render(self, size, Offset(0, 0))
+    self.display.remove_clip()
+
+    regions = []
+    for key in changed:
+      if key not in previous or key not in child.bounds:
+        self.dirty = True
+        return
+      regions.append(align_region(previous[key], width, height))
+      regions.append(align_region(child.bounds[key], width, height))
+
+    regions = merge_regions(regions)
+    if sum(region_area(region) for region in regions) > width * height * PARTIAL_AREA_LIMIT:
+      self.dirty = True
+      return
+
+    for x, y, w, h in regions:
+      self.display.set_clip(x, y, w, h)
+      self.display.set_pen(15)
+      self.display.rectangle(x, y, w, h)
+      self.render(self, size, Offset(0, 0))
+      self.display.remove_clip()
+      self.display.partial_update(x, y, w, h)
+    self.partial_updates += 1
@@ -1,3 +1,58 @@
+from typing import Tuple, TypeAlias
+
+Region: TypeAlias = Tuple[int, int, int, int]
+
+REGION_ALIGN = 8
+REGION_PADDING = 2
+
+
 class ClientSettings:
   def __init__(self, absolute_scores: bool):
     self.absolute_scores = absolute_scores
+
+
+def align_region(region: Region, width: int, height: int) -> Region:
+  x, y, w, h = region
+  left = max(0, x - REGION_PADDING)
+  right = min(width, x + w + REGION_PADDING)
+  top = max(0, (y - REGION_PADDING) // REGION_ALIGN * REGION_ALIGN)
+  bottom = min(height, -(-(y + h + REGION_PADDING) // REGION_ALIGN) * REGION_ALIGN)
+  return (left, top, max(0, right - left), max(0, bottom - top))
+
+
+def region_area(region: Region):
+  return region[2] * region[3]
+
+
+def touches(a: Region, b: Region):
+  return (
+      a[0] <= b[0] + b[2] and b[0] <= a[0] + a[2] and
+      a[1] <= b[1] + b[3] and b[1] <= a[1] + a[3]
+  )
+
+
+def union(a: Region, b: Region) -> Region:
+  left = min(a[0], b[0])
+  top = min(a[1], b[1])
+  right = max(a[0] + a[2], b[0] + b[2])
+  bottom = max(a[1] + a[3], b[1] + b[3])
+  return (left, top, right - left, bottom - top)
+
+
+def merge_regions(regions: list[Region]) -> list[Region]:
+  regions = [region for region in regions if region_area(region)]
+  merged = True
+  while merged:
+    merged = False
+    for i in range(len(regions)):
+      for j in range(i + 1, len(regions)):
+        a, b = regions[i], regions[j]
+        combined = union(a, b)
+        if touches(a, b) or region_area(combined) <= region_area(a) + region_area(b):
+          regions[i] = combined
+          del regions[j]
+          merged = True
+          break
+      if merged:
+        break
+  return regions
@@ -10,10 +10,12 @@ if typing.TYPE_CHECKING:
 
 
 class ClientState(Widget):
-  def __init__(self, client: Client):
+  def __init__(self, client: 'Client'):
     print(self.__class__.__name__)
     self.client = client
     self.first_render = True
+    self.bounds: dict = {}
+    self.changed: set = set()
 
   def init(self):
     pass
@@ -36,6 +38,9 @@ class ClientState(Widget):
   def on_server_packet(self, packet: Packet) -> bool:
     return False
 
+  def invalidate(self, *keys):
+    self.changed.update(keys)
+
   def send_packet(self, packet: Packet):
     self.client.send_packet(packet)
 
@@ -12,6 +12,10 @@ from mahjong2040.shared import ClientGameState, GamePlayerMixin, Wind
 
 from .game_menu import GameMenuClientState
 from .shared import GameReconnectClientState
+from .widgets.bounds import BoundsWidget
+
+RIICHI_KEY = 'riichi'
+HONBA_KEY = 'honba'
 
 
 class GameClientState(GameReconnectClientState):
@@ -29,11 +33,35 @@ class GameClientState(GameReconnectClientState):
 
   def on_server_packet(self, packet: Packet) -> bool:
     if isinstance(packet, GameStateServerPacket):
+      changed = self.changed_keys(self.game_state, packet.game_state)
       self.game_state = packet.game_state
-      return True
+      if changed is None:
+        return True
+
+      self.invalidate(*changed)
+      return False
 
     return super().on_server_packet(packet)
 
+  def changed_keys(self, old: ClientGameState, new: ClientGameState):
+    if (
+        old.player_index != new.player_index or
+        old.hand != new.hand or
+        old.starting_points != new.starting_points
+    ):
+      return None
+
+    changed = [
+        index
+        for index, (old_player, new_player) in enumerate(zip(old.players, new.players))
+        if old_player.points != new_player.points or old_player.riichi != new_player.riichi
+    ]
+    if old.total_riichi != new.total_riichi:
+      changed.append(RIICHI_KEY)
+    if old.total_honba != new.total_honba:
+      changed.append(HONBA_KEY)
+    return changed
+
   def on_button(self, app: App, pressed: dict[int, bool]) -> bool:
     if pressed[badger2040.BUTTON_B]:
       app.child = GameMenuClientState(self.client, self.game_state)
@@ -54,30 +82,10 @@ class GameClientState(GameReconnectClientState):
 
     (wind1, player1), (wind2, player2), (wind3, player3), (wind4, player4) = self.game_state.players_from_me
 
-    Bottom(child=Center(child=PlayerWidget(
-        player=player1,
-        wind=wind1,
-        starting_points=self.game_state.starting_points,
-        absolute=self.settings.absolute_scores,
-    ))).render(app, size, offset)
-    Right(child=Center(child=PlayerWidget(
-        player=player2,
-        wind=wind2,
-        starting_points=self.game_state.starting_points,
-        absolute=self.settings.absolute_scores,
-    ))).render(app, size, offset)
-    Top(child=Center(child=PlayerWidget(
-        player=player3,
-        wind=wind3,
-        starting_points=self.game_state.starting_points,
-        absolute=self.settings.absolute_scores,
-    ))).render(app, size, offset)
-    Left(child=Center(child=PlayerWidget(
-        player=player4,
-        wind=wind4,
-        starting_points=self.game_state.starting_points,
-        absolute=self.settings.absolute_scores,
-    ))).render(app, size, offset)
+    Bottom(child=Center(child=self.player_widget(wind1, player1))).render(app, size, offset)
+    Right(child=Center(child=self.player_widget(wind2, player2))).render(app, size, offset)
+    Top(child=Center(child=self.player_widget(wind3, player3))).render(app, size, offset)
+    Left(child=Center(child=self.player_widget(wind4, player4))).render(app, size, offset)
 
     Center(child=TextWidget(
         text=self.round_text,
@@ -85,18 +93,26 @@ class GameClientState(GameReconnectClientState):
         thickness=2,
     )).render(app, size, offset)
 
-    Left(child=TextWidget(
+    Left(child=BoundsWidget(self.bounds, RIICHI_KEY, TextWidget(
         text=f'R: {self.game_state.total_riichi}',
         line_height=18,
         thickness=2,
         scale=0.6,
-    )).render(app, size, offset)
-    Right(child=TextWidget(
+    ))).render(app, size, offset)
+    Right(child=BoundsWidget(self.bounds, HONBA_KEY, TextWidget(
         text=f'H: {self.game_state.total_honba}',
         line_height=18,
         thickness=2,
         scale=0.6,
-    )).render(app, size, offset)
+    ))).render(app, size, offset)
+
+  def player_widget(self, wind: int, player: GamePlayerMixin):
+    return BoundsWidget(self.bounds, self.game_state.player_index_for_wind(wind), PlayerWidget(
+        player=player,
+        wind=wind,
+        starting_points=self.game_state.starting_points,
+        absolute=self.settings.absolute_scores,
+    ))
 
 
 class RiichiWidget(Widget):
@@ -6,6 +6,7 @@ from badger_ui.text import TextWidget
 from badger_ui import App, Offset, Size
 from mahjong2040.client import Client
 from mahjong2040.packets import (
+    GameStateServerPacket,
     LobbyPlayersServerPacket,
     Packet,
     SetupPlayerWindServerPacket,
@@ -33,6 +34,11 @@ class LobbyClientState(ClientState):
       self.child = SetupPlayerWindClientState(self.client, packet.wind)
       return True
 
+    elif isinstance(packet, GameStateServerPacket):
+      from .game import GameClientState
+      self.child = GameClientState(self.client, packet.game_state)
+      return True
+
     return super().on_server_packet(packet)
 
   def render(self, app: App, size: Size, offset: Offset):
@@ -4,13 +4,13 @@ from badger_ui.column import Column
 from badger_ui.list import ListWidget
 from badger_ui.sized import SizedBox
 from badger_ui.text import TextWidget
-from machine import Timer
 
 import badger2040
 from badger_ui import App, Offset, Size
 from mahjong2040 import config
 from mahjong2040.client import Client
 from mahjong2040.packets import (
+    BROADCAST_ADDRESS,
     BroadcastClientPacket,
     BroadcastServerPacket,
     Packet,
@@ -25,14 +25,15 @@ class ServerListClientState(ClientState):
   def __init__(self, client: Client, port: int):
     super().__init__(client)
 
-    self.address = ('255.255.255.255', port)
-    self.servers = []
+    self.address = (BROADCAST_ADDRESS, port)
+    self.servers: list[tuple[Address, int]] = []
+    self.tables: dict[tuple[Address, int], BroadcastServerPacket] = {}
     self.list = None
 
-    self.timer = Timer(mode=Timer.PERIODIC, period=10000, callback=self.broadcast)
-    self.broadcast()
+  def init(self):
+    self.probe()
 
-  def broadcast(self, *args, **kwargs):
+  def probe(self):
     if not self.client.socket:
       return
 
@@ -40,12 +41,14 @@ class ServerListClientState(ClientState):
 
   def on_broadcast_packet(self, packet: Packet, address: Address):
     if isinstance(packet, BroadcastServerPacket):
-      if address not in self.servers:
-        if config.autoconnect:
-          AddressItem(address, self.on_item_selected)()
+      key = (address, packet.table)
+      self.tables[key] = packet
+      if key not in self.servers:
+        if config.autoconnect and not packet.full:
+          AddressItem(address, packet, self.on_item_selected)()
           return
 
-        self.servers.append(address)
+        self.servers.append(key)
         self.update_list()
 
   def update_list(self):
@@ -61,15 +64,24 @@ class ServerListClientState(ClientState):
       self.list = None
 
   def item_builder(self, index: int, selected: bool):
+    key = self.servers[index]
+    address, _ = key
     return AddressItemWidget(
-        item=AddressItem(self.servers[index], self.on_item_selected),
+        item=AddressItem(address, self.tables[key], self.on_item_selected),
         selected=selected,
     )
 
   def on_item_selected(self, item: 'AddressItem'):
     from mahjong2040.client import RemoteClientServer
-    self.timer.deinit()
-    self.client.connect(RemoteClientServer(self.client, self.client.poll, item.address))
+    self.client.connect(RemoteClientServer(
+        self.client,
+        self.client.poll,
+        item.address,
+        item.table.version,
+        config.heartbeat_interval,
+        config.heartbeat_misses,
+        item.table.table,
+    ))
 
   def on_button(self, app: 'App', pressed: dict[int, bool]) -> bool:
     if self.list:
@@ -92,10 +104,18 @@ class ServerListClientState(ClientState):
 
 
 class AddressItem:
-  def __init__(self, address: Address, callable):
+  def __init__(self, address: Address, table: BroadcastServerPacket, callable):
     self.address = address
+    self.table = table
     self.callable = callable
 
+  @property
+  def text(self):
+    name = self.table.name or self.address[0]
+    if not self.table.version:
+      return name
+    return f'{name} {self.table.seated}/{self.table.max_players}'
+
   def __call__(self):
     self.callable(self)
 
@@ -123,7 +143,7 @@ class AddressItemWidget(Widget):
       )
 
     Center(child=TextWidget(
-        text=self.item.address[0],
+        text=self.item.text,
         line_height=24,
         font='sans',
         thickness=2,
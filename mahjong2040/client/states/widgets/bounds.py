@@ -0,0 +1,18 @@
+from badger_ui.base import App, Offset, Size, Widget
+
+
+class BoundsWidget(Widget):
+  def __init__(self, bounds: dict, key, child: Widget):
+    self.bounds = bounds
+    self.key = key
+    self.child = child
+
+  def on_button(self, app: App, pressed: dict[int, bool]) -> bool:
+    return self.child.on_button(app, pressed)
+
+  def measure(self, app: 'App', size: Size) -> Size:
+    return self.child.measure(app, size)
+
+  def render(self, app: 'App', size: Size, offset: Offset):
+    self.bounds[self.key] = (offset.x, offset.y, size.width, size.height)
+    self.child.render(app, size, offset)
@@ -1,3 +1,4 @@
+from mahjong2040.packets import HEARTBEAT_INTERVAL, HEARTBEAT_MISSES
 from mahjong2040.shared import IntEnum, Wind
 
 
@@ -9,6 +10,25 @@ class ModeState(IntEnum):
 Mode = ModeState()
 
 
+class DiscoveryState(IntEnum):
+  BROADCAST = 0
+  MULTICAST = 1
+
+
+Discovery = DiscoveryState()
+
+
+class TransportState(IntEnum):
+  POLL = 0
+  ASYNCIO = 1
+
+
+Transport = TransportState()
+
+MULTICAST_GROUP = '239.20.40.1'
+MULTICAST_TTL = 1
+
+
 def parse_mode(value: str):
   try:
     return Mode.by_name(value.upper())
@@ -33,10 +53,38 @@ def parse_wind(value: str):
     return None
 
 
-def parse_config() -> tuple[int | None, bool | None, int | None]:
+def parse_discovery(value: str):
+  try:
+    return Discovery.by_name(value.upper())
+  except Exception:
+    return Discovery.BROADCAST
+
+
+def parse_transport(value: str):
+  try:
+    return Transport.by_name(value.upper())
+  except Exception:
+    return Transport.POLL
+
+
+def parse_ttl(value: str):
+  try:
+    return max(1, min(255, int(value)))
+  except ValueError:
+    return MULTICAST_TTL
+
+
+def parse_int(value: str, default: int, minimum: int):
+  try:
+    return max(minimum, int(value))
+  except ValueError:
+    return default
+
+
+def read_config() -> dict[str, str]:
   try:
     with open('/config.ini', 'r') as f:
-      config = {
+      return {
           key.strip(): value.strip()
           for key, value in (
               value.split('=', 1)
@@ -44,13 +92,38 @@ def parse_config() -> tuple[int | None, bool | None, int | None]:
               if '=' in value
           )
       }
-
-    mode = parse_mode(config.get('mode', ''))
-    autoconnect = parse_autoconnect(config.get('autoconnect', ''))
-    select_wind = parse_wind(config.get('wind', ''))
-    return mode, autoconnect, select_wind
   except BaseException:
-    return None, None, None
+    return {}
+
+
+values = read_config()
+mode = parse_mode(values.get('mode', ''))
+autoconnect = parse_autoconnect(values.get('autoconnect', ''))
+select_wind = parse_wind(values.get('wind', ''))
+name = values.get('name', '')
+discovery = parse_discovery(values.get('discovery', ''))
+multicast_group = values.get('multicast_group', '') or MULTICAST_GROUP
+multicast_ttl = parse_ttl(values.get('multicast_ttl', ''))
+heartbeat_interval = parse_int(values.get('heartbeat_interval', ''), HEARTBEAT_INTERVAL, 250)
+heartbeat_misses = parse_int(values.get('heartbeat_misses', ''), HEARTBEAT_MISSES, 1)
+transport = parse_transport(values.get('transport', ''))
+
+
+def discovery_group():
+  if discovery == Discovery.MULTICAST:
+    return multicast_group
+  return None
+
+
+def create_poll():
+  if transport == Transport.ASYNCIO:
+    from mahjong2040.aiopoll import AsyncPoll
+    return AsyncPoll()
 
+  import select
+  if hasattr(select, 'epoll'):
+    from mahjong2040.epoll import EPoll
+    return EPoll()
 
-mode, autoconnect, select_wind = parse_config()
+  from mahjong2040.poll import Poll
+  return Poll()
@@ -0,0 +1,36 @@
+import select
+from typing import Any, Callable
+
+from .poll import EventCallback, Poll
+
+
+class EPoll(Poll):
+  def __init__(self):
+    super().__init__()
+    self._poll = select.epoll()
+    self.fds: dict[int, EventCallback] = {}
+    self.filenos: dict[int, int] = {}
+
+  def register(self, fd: Any, eventmask: int, callback: Callable[[Any, int], None]):
+    super().register(fd, eventmask, callback)
+    self.fds[fd.fileno()] = self.lookup[id(fd)]
+    self.filenos[id(fd)] = fd.fileno()
+
+  def unregister(self, fd: Any):
+    fileno = self.filenos.pop(id(fd))
+    del self.fds[fileno]
+    del self.lookup[id(fd)]
+    try:
+      self._poll.unregister(fileno)
+    except OSError:
+      pass
+
+  def wait(self, timeout: int):
+    return self._poll.poll(timeout / 1000 if timeout >= 0 else -1)
+
+  def find(self, fd: int):
+    return self.fds.get(fd)
+
+  def close(self):
+    super().close()
+    self._poll.close()
@@ -1,40 +1,42 @@
+import errno
 import socket
-import struct
 
-from .shared import Address, ClientGameState, GamePlayerMixin, GameState, Wind
+from . import schema
+from .schema import BOOL, INT8, INT16, UINT8, UINT16, UINT32, Array, Bits, Bytes, Codec, Record, StructError, Text
+from .shared import Address, ClientGameState, GamePlayerMixin, GameState, Phase, Wind
 
+PROTOCOL_VERSION = 3
 
-class Struct:
-  fmt: str
+CAP_BATCH = 1 << 0
+CAP_DELTA = 1 << 1
+CAP_HEARTBEAT = 1 << 2
+CAP_RESUME = 1 << 3
+CAPABILITIES = CAP_BATCH | CAP_DELTA | CAP_HEARTBEAT | CAP_RESUME
 
-  @classmethod
-  def from_data(cls, buffer: bytes, offset=0):
-    offset, data = cls.unpack(buffer, offset)
-    return cls(*data)
+RESUME_TOKEN_SIZE = 8
 
-  def pack_data(self):
-    return ()
+HEARTBEAT_INTERVAL = 2000
+HEARTBEAT_MISSES = 3
 
-  def pack(self, buffer: bytearray, offset=0) -> int:
-    struct.pack_into(self.fmt, buffer, offset, *self.pack_data())
-    return offset + struct.calcsize(self.fmt)
+BROADCAST_ADDRESS = '255.255.255.255'
+BEACON_PORT_OFFSET = 1
+SO_BROADCAST = getattr(socket, 'SO_BROADCAST', 32)
+IPPROTO_IP = getattr(socket, 'IPPROTO_IP', 0)
+IP_MULTICAST_TTL = getattr(socket, 'IP_MULTICAST_TTL', None)
+IP_ADD_MEMBERSHIP = getattr(socket, 'IP_ADD_MEMBERSHIP', 0x400)
+IPPROTO_TCP = getattr(socket, 'IPPROTO_TCP', 6)
+TCP_NODELAY = getattr(socket, 'TCP_NODELAY', None)
+EWOULDBLOCK = getattr(errno, 'EWOULDBLOCK', errno.EAGAIN)
 
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0) -> tuple[int, tuple]:
-    return offset + struct.calcsize(cls.fmt), struct.unpack_from(cls.fmt, buffer, offset)
-
-  @classmethod
-  def unpack(cls, buffer: bytes, offset=0):
-    data = cls._unpack(cls, buffer, offset)
-    return data
 
-  @staticmethod
-  def _size(cls):
-    return struct.calcsize(cls.fmt)
+class Struct:
+  fields: tuple = ()
+  codec: Codec
+  fixed_size: int
 
   @classmethod
   def size(cls):
-    return cls._size(cls)
+    return cls.fixed_size
 
   def __repr__(self) -> str:
     args = ', '.join([
@@ -45,363 +47,371 @@ class Struct:
 
 
 class LengthStruct(Struct):
-  fmt = '>I'
+  byteorder = '>'
+  fields = (
+      ('length', UINT32),
+  )
 
   def __init__(self, length: int) -> None:
     self.length = length
 
-  def pack_data(self) -> tuple:
-    return (self.length,)
-
 
 class PlayerStruct(Struct, GamePlayerMixin):
-  fmt = 'hB'
+  fields = (
+      ('points', INT16),
+      ('riichi', BOOL),
+  )
 
   def __init__(self, points: int, riichi: bool) -> None:
     self.points = points
     self.riichi = riichi
 
-  def pack_data(self) -> tuple:
-    return (self.points, 1 if self.riichi else 0,)
 
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0):
-    offset, (points, riichi) = super()._unpack(cls, buffer, offset)
-    return offset, (points, riichi != 0)
+PLAYERS = Array(Record(PlayerStruct), len(Wind))
+
+GAME_STATE = Record(GameState, (
+    ('starting_points', UINT16),
+    ('hand', UINT8),
+    ('repeat', UINT8),
+    ('bonus_honba', UINT8),
+    ('bonus_riichi', UINT8),
+    ('players', PLAYERS),
+))
+
+CLIENT_GAME_STATE = Record(ClientGameState, (
+    ('starting_points', UINT16),
+    ('hand', UINT8),
+    ('repeat', UINT8),
+    ('bonus_honba', UINT8),
+    ('bonus_riichi', UINT8),
+    ('player_index', UINT8),
+    ('players', PLAYERS),
+))
 
 
 class GameStateStruct(Struct):
-  fmt = 'HBBBB'
+  fields = (
+      ('game_state', GAME_STATE),
+  )
 
   def __init__(self, game_state: GameState) -> None:
     self.game_state = game_state
 
-  def pack_data(self) -> tuple:
-    return (
-        self.game_state.starting_points,
-        self.game_state.hand,
-        self.game_state.repeat,
-        self.game_state.bonus_honba,
-        self.game_state.bonus_riichi,
-    )
-
-  def pack(self, buffer: bytearray, offset=0):
-    offset = super().pack(buffer, offset)
-    for player in self.game_state.players:
-      offset = PlayerStruct(player.points, player.riichi).pack(buffer, offset)
-    return offset
-
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0):
-    offset, (
-        starting_points,
-        hand,
-        repeat,
-        bonus_honba,
-        bonus_riichi,
-    ) = super()._unpack(cls, buffer, offset)
-
-    players: list[PlayerStruct] = []
-    for _ in range(4):
-      offset, data = PlayerStruct.unpack(buffer, offset)
-      players.append(PlayerStruct(*data))
-
-    return offset, (
-        GameState(
-            tuple(players),
-            starting_points,
-            hand,
-            repeat,
-            bonus_honba,
-            bonus_riichi,
-        ),
-    )
-
-  @classmethod
-  def size(cls):
-    return super()._size(cls) + (PlayerStruct.size() * len(Wind))
-
 
 class ClientGameStateStruct(Struct):
-  fmt = 'HBBBBB'
+  fields = (
+      ('game_state', CLIENT_GAME_STATE),
+  )
 
   def __init__(self, game_state: ClientGameState) -> None:
     self.game_state = game_state
 
-  def pack_data(self) -> tuple:
-    return (
-        self.game_state.starting_points,
-        self.game_state.hand,
-        self.game_state.repeat,
-        self.game_state.bonus_honba,
-        self.game_state.bonus_riichi,
-        self.game_state.player_index,
-    )
 
-  def pack(self, buffer: bytearray, offset=0):
-    offset = super().pack(buffer, offset)
-    for player in self.game_state.players:
-      offset = PlayerStruct(player.points, player.riichi).pack(buffer, offset)
-    return offset
+class GameCountersStruct(Struct):
+  fields = (
+      ('hand', UINT8),
+      ('repeat', UINT8),
+      ('bonus_honba', UINT8),
+      ('bonus_riichi', UINT8),
+  )
 
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0):
-    offset, (
-        starting_points,
-        hand,
-        repeat,
-        bonus_honba,
-        bonus_riichi,
-        player_index,
-    ) = super()._unpack(cls, buffer, offset)
-
-    players: list[PlayerStruct] = []
-    for _ in range(4):
-      offset, data = PlayerStruct.unpack(buffer, offset)
-      players.append(PlayerStruct(*data))
-
-    return offset, (
-        ClientGameState(
-            player_index,
-            tuple(players),
-            starting_points,
-            hand,
-            repeat,
-            bonus_honba,
-            bonus_riichi,
-        ),
-    )
-
-  @classmethod
-  def size(cls):
-    return super()._size(cls) + (PlayerStruct.size() * len(Wind))
+  def __init__(self, hand: int, repeat: int, bonus_honba: int, bonus_riichi: int) -> None:
+    self.hand = hand
+    self.repeat = repeat
+    self.bonus_honba = bonus_honba
+    self.bonus_riichi = bonus_riichi
 
 
 class PacketIdStruct(Struct):
-  fmt = 'B'
+  fields = (
+      ('id', UINT8),
+  )
 
   def __init__(self, id: int):
     self.id = id
 
-  def pack_data(self) -> tuple:
-    return self.id,
-
 
 class Packet(Struct):
   id: int
 
 
+class GameStatePacket(Packet):
+  game_state: ClientGameState
+  player_index_offset: int
+
+
 class BroadcastClientPacket(Packet):
-  fmt = ''
   id = 0
 
 
 class RiichiClientPacket(Packet):
-  fmt = ''
   id = 1
 
 
 class TsumoClientPacket(Packet):
-  fmt = 'bb'
   id = 2
+  fields = (
+      ('han', INT8),
+      ('fu_index', INT8),
+  )
 
   def __init__(self, han: int, fu_index: int):
     self.han = han
     self.fu_index = fu_index
 
-  def pack_data(self) -> tuple:
-    return (self.han, self.fu_index,)
-
 
 class RonWindClientPacket(Packet):
-  fmt = 'B'
   id = 3
+  fields = (
+      ('from_wind', UINT8),
+  )
 
   def __init__(self, from_wind: int):
     self.from_wind = from_wind
 
-  def pack_data(self) -> tuple:
-    return (self.from_wind,)
-
 
 class RonScoreClientPacket(Packet):
-  fmt = 'bb'
   id = 4
+  fields = (
+      ('han', INT8),
+      ('fu_index', INT8),
+  )
 
   def __init__(self, han: int, fu_index: int):
     self.han = han
     self.fu_index = fu_index
 
-  def pack_data(self) -> tuple:
-    return (self.han, self.fu_index,)
-
 
 class DrawClientPacket(Packet):
-  fmt = 'B'
   id = 5
+  fields = (
+      ('tenpai', UINT8),
+  )
 
   def __init__(self, tenpai: int):
     self.tenpai = tenpai
 
-  def pack_data(self) -> tuple:
-    return (self.tenpai,)
-
 
 class RedrawClientPacket(Packet):
-  fmt = ''
   id = 6
 
 
 class SetupPlayerWindClientPacket(Packet):
-  fmt = 'B'
   id = 7
+  fields = (
+      ('wind', UINT8),
+  )
 
   def __init__(self, wind: int):
     self.wind = wind
 
-  def pack_data(self) -> tuple:
-    return (self.wind,)
+
+class GameStateRequestClientPacket(Packet):
+  id = 8
+
+
+class HelloClientPacket(Packet):
+  id = 9
+  fields = (
+      ('version', UINT8),
+      ('capabilities', UINT8),
+  )
+
+  def __init__(self, version: int, capabilities: int):
+    self.version = version
+    self.capabilities = capabilities
+
+
+class PingClientPacket(Packet):
+  id = 10
+  fields = (
+      ('stamp', UINT32),
+  )
+
+  def __init__(self, stamp: int):
+    self.stamp = stamp
+
+
+class PongClientPacket(Packet):
+  id = 11
+  fields = (
+      ('stamp', UINT32),
+  )
+
+  def __init__(self, stamp: int):
+    self.stamp = stamp
+
+
+class ResumeClientPacket(Packet):
+  id = 12
+  fields = (
+      ('token', Bytes(RESUME_TOKEN_SIZE)),
+  )
+
+  def __init__(self, token: bytes):
+    self.token = token
+
+
+class JoinTableClientPacket(Packet):
+  id = 13
+  fields = (
+      ('table', UINT8),
+  )
+
+  def __init__(self, table: int):
+    self.table = table
 
 
 class BroadcastServerPacket(Packet):
-  fmt = ''
   id = 100
+  fields = (
+      ('version', UINT8),
+      ('capabilities', UINT8),
+      ('seated', UINT8),
+      ('max_players', UINT8),
+      ('phase', UINT8),
+      ('hand', UINT8),
+      ('name', Text(16)),
+      ('table', UINT8),
+  )
+
+  def __init__(
+      self,
+      version: int = PROTOCOL_VERSION,
+      capabilities: int = CAPABILITIES,
+      seated: int = 0,
+      max_players: int = len(Wind),
+      phase: int = Phase.LOBBY,
+      hand: int = 0,
+      name: str = '',
+      table: int = 0,
+  ):
+    self.version = version
+    self.capabilities = capabilities
+    self.seated = seated
+    self.max_players = max_players
+    self.phase = phase
+    self.hand = hand
+    self.name = name
+    self.table = table
+
+  @classmethod
+  def from_data(cls, buffer: bytes, offset=0):
+    size = len(buffer) - offset
+    if size < cls.fixed_size - UINT8.size:
+      return cls(0, 0)
+    if size < cls.fixed_size:
+      buffer = bytes(buffer[offset:]) + bytes(UINT8.size)
+      offset = 0
+    return cls.decode(buffer, offset)
+
+  @property
+  def full(self):
+    return self.phase != Phase.RECONNECT and self.seated >= self.max_players
 
 
-class GameStateServerPacket(Packet):
-  fmt = ''
+class GameStateServerPacket(GameStatePacket):
   id = 101
+  fields = (
+      ('game_state', CLIENT_GAME_STATE),
+  )
 
   def __init__(self, game_state: ClientGameState):
     self.game_state = game_state
 
-  def pack(self, buffer: bytearray, offset=0):
-    offset = super().pack(buffer, offset)
-    offset = ClientGameStateStruct(self.game_state).pack(buffer, offset)
-    return offset
-
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0):
-    offset, data = super()._unpack(cls, buffer, offset)
-    offset, game_state = ClientGameStateStruct.unpack(buffer, offset)
-    return offset, data + game_state
-
-  @staticmethod
-  def _size(cls):
-    return super()._size(cls) + ClientGameStateStruct.size()
-
 
 class DrawTenpaiServerPacket(Packet):
-  fmt = 'B'
   id = 102
+  fields = (
+      ('tenpai', UINT8),
+  )
 
   def __init__(self, tenpai: int):
     self.tenpai = tenpai
 
-  def pack_data(self) -> tuple:
-    return (self.tenpai,)
-
 
 class RedrawServerPacket(Packet):
-  fmt = ''
   id = 103
 
 
 class RonWindServerPacket(Packet):
-  fmt = 'BB'
   id = 104
+  fields = (
+      ('from_wind', UINT8),
+      ('is_dealer', BOOL),
+  )
 
   def __init__(self, from_wind: int, is_dealer: bool):
     self.from_wind = from_wind
     self.is_dealer = is_dealer
 
-  def pack_data(self) -> tuple:
-    return (self.from_wind, 1 if self.is_dealer else 0)
-
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0):
-    offset, (from_wind, is_dealer) = super()._unpack(cls, buffer, offset)
-    return offset, (from_wind, is_dealer != 0)
-
 
 class RonScoreServerPacket(Packet):
-  fmt = 'Bh'
   id = 105
+  fields = (
+      ('from_wind', UINT8),
+      ('points', INT16),
+  )
 
   def __init__(self, from_wind: int, points: int):
     self.from_wind = from_wind
     self.points = points
 
-  def pack_data(self) -> tuple:
-    return (self.from_wind, self.points,)
-
 
 class SetupPlayerWindServerPacket(Packet):
-  fmt = 'B'
   id = 106
+  fields = (
+      ('wind', UINT8),
+  )
 
   def __init__(self, wind: int):
     self.wind = wind
 
-  def pack_data(self) -> tuple:
-    return (self.wind,)
-
 
 class ConfirmWindServerPacket(Packet):
-  fmt = 'B'
   id = 107
+  fields = (
+      ('wind', UINT8),
+  )
 
   def __init__(self, wind: int):
     self.wind = wind
 
-  def pack_data(self) -> tuple:
-    return (self.wind,)
-
 
 class SetupPlayerCountErrorServerPacket(Packet):
-  fmt = ''
   id = 108
 
 
 class LobbyPlayersServerPacket(Packet):
-  fmt = 'BB'
   id = 109
+  fields = (
+      ('count', UINT8),
+      ('max_players', UINT8),
+  )
 
   def __init__(self, count: int, max_players: int):
     self.count = count
     self.max_players = max_players
 
-  def pack_data(self) -> tuple:
-    return (self.count, self.max_players,)
-
 
 class GameReconnectStatusServerPacket(Packet):
-  fmt = 'B'
   id = 110
+  fields = (
+      ('missing_winds', Bits(len(Wind))),
+  )
 
   def __init__(self, missing_winds: set[int]):
     self.missing_winds = missing_winds
 
-  def pack_data(self) -> tuple:
-    value = 0
-    for wind in self.missing_winds:
-      value |= (1 << wind)
-    return (value,)
-
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0):
-    offset, (missing_winds,) = super()._unpack(cls, buffer, offset)
-
-    return offset, ({
-        wind
-        for wind in range(len(Wind))
-        if (missing_winds >> wind & 1) != 0
-    },)
-
 
-class TsumoServerPacket(Packet):
-  fmt = 'BBhhhh'
+class TsumoServerPacket(GameStatePacket):
   id = 111
+  fields = (
+      ('tsumo_wind', UINT8),
+      ('tsumo_hand', UINT8),
+      ('points', Array(INT16, len(Wind))),
+      ('game_state', CLIENT_GAME_STATE),
+  )
 
   def __init__(self, tsumo_wind: int, tsumo_hand: int, points: tuple[int, int, int, int], game_state: ClientGameState):
     self.game_state = game_state
@@ -409,28 +419,15 @@ class TsumoServerPacket(Packet):
     self.tsumo_hand = tsumo_hand
     self.points = points
 
-  def pack_data(self) -> tuple:
-    return (self.tsumo_wind, self.tsumo_hand) + self.points
 
-  def pack(self, buffer: bytearray, offset=0):
-    offset = super().pack(buffer, offset)
-    offset = ClientGameStateStruct(self.game_state).pack(buffer, offset)
-    return offset
-
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0):
-    offset, (tsumo_wind, tsumo_hand, *points) = super()._unpack(cls, buffer, offset)
-    offset, game_state = ClientGameStateStruct.unpack(buffer, offset)
-    return offset, (tsumo_wind, tsumo_hand, points) + game_state
-
-  @staticmethod
-  def _size(cls):
-    return super()._size(cls) + ClientGameStateStruct.size()
-
-
-class RonServerPacket(Packet):
-  fmt = 'BBhhhh'
+class RonServerPacket(GameStatePacket):
   id = 112
+  fields = (
+      ('ron_wind', UINT8),
+      ('ron_hand', UINT8),
+      ('points', Array(INT16, len(Wind))),
+      ('game_state', CLIENT_GAME_STATE),
+  )
 
   def __init__(self, ron_wind: int, ron_hand: int, points: tuple[int, int, int, int], game_state: ClientGameState):
     self.game_state = game_state
@@ -438,28 +435,15 @@ class RonServerPacket(Packet):
     self.ron_hand = ron_hand
     self.points = points
 
-  def pack_data(self) -> tuple:
-    return (self.ron_wind, self.ron_hand) + self.points
-
-  def pack(self, buffer: bytearray, offset=0):
-    offset = super().pack(buffer, offset)
-    offset = ClientGameStateStruct(self.game_state).pack(buffer, offset)
-    return offset
-
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0):
-    offset, (ron_wind, ron_hand, *points) = super()._unpack(cls, buffer, offset)
-    offset, game_state = ClientGameStateStruct.unpack(buffer, offset)
-    return offset, (ron_wind, ron_hand, points) + game_state
-
-  @staticmethod
-  def _size(cls):
-    return super()._size(cls) + ClientGameStateStruct.size()
-
 
-class DrawServerPacket(Packet):
-  fmt = 'BBBBBhhhh'
+class DrawServerPacket(GameStatePacket):
   id = 113
+  fields = (
+      ('draw_hand', UINT8),
+      ('tenpai', Array(BOOL, len(Wind))),
+      ('points', Array(INT16, len(Wind))),
+      ('game_state', CLIENT_GAME_STATE),
+  )
 
   def __init__(self, draw_hand: int, tenpai: tuple[bool, bool, bool, bool],
                points: tuple[int, int, int, int], game_state: ClientGameState):
@@ -468,42 +452,135 @@ class DrawServerPacket(Packet):
     self.points = points
     self.game_state = game_state
 
-  def pack_data(self) -> tuple:
-    tenpai = tuple((
-        1 if tenpai else 0
-        for tenpai in self.tenpai
-    ))
-    return (self.draw_hand,) + tenpai + self.points
+
+class GameStateDeltaServerPacket(Packet):
+  id = 114
+  fields = (
+      ('seq', UINT8),
+      ('mask', UINT8),
+  )
+  counters_flag = 1 << len(Wind)
+
+  def __init__(self, seq: int, players: tuple[PlayerStruct | None, ...], counters: GameCountersStruct | None):
+    self.seq = seq
+    self.players = players
+    self.counters = counters
+
+  @property
+  def mask(self):
+    mask = 0
+    for index, player in enumerate(self.players):
+      if player is not None:
+        mask |= (1 << index)
+    if self.counters is not None:
+      mask |= self.counters_flag
+    return mask
 
   def pack(self, buffer: bytearray, offset=0):
-    offset = super().pack(buffer, offset)
-    offset = ClientGameStateStruct(self.game_state).pack(buffer, offset)
+    self.codec.pack_into(buffer, offset, self.seq, self.mask)
+    offset += self.fixed_size
+    for player in self.players:
+      if player is not None:
+        offset = player.pack(buffer, offset)
+    if self.counters is not None:
+      offset = self.counters.pack(buffer, offset)
     return offset
 
-  @staticmethod
-  def _unpack(cls, buffer: bytes, offset=0):
-    offset, (draw_hand, tenpai0, tenpai1, tenpai2, tenpai3, points0, points1,
-             points2, points3) = super()._unpack(cls, buffer, offset)
-    tenpai = (
-        tenpai0 != 0,
-        tenpai1 != 0,
-        tenpai2 != 0,
-        tenpai3 != 0,
-    )
-    points = (
-        points0,
-        points1,
-        points2,
-        points3,
+  @classmethod
+  def from_data(cls, buffer: bytes, offset=0):
+    seq, mask = cls.codec.unpack_from(buffer, offset)
+    offset += cls.fixed_size
+
+    players: list[PlayerStruct | None] = []
+    for index in range(len(Wind)):
+      if mask >> index & 1:
+        players.append(PlayerStruct.from_data(buffer, offset))
+        offset += PlayerStruct.size()
+      else:
+        players.append(None)
+
+    counters = None
+    if mask & cls.counters_flag:
+      counters = GameCountersStruct.from_data(buffer, offset)
+
+    return cls(seq, tuple(players), counters)
+
+  def size(self):
+    size = self.fixed_size
+    for player in self.players:
+      if player is not None:
+        size += PlayerStruct.size()
+    if self.counters is not None:
+      size += GameCountersStruct.size()
+    return size
+
+  def apply(self, game_state: ClientGameState) -> ClientGameState:
+    counters = self.counters or game_state
+    return ClientGameState(
+        game_state.player_index,
+        players=tuple((
+            player if player is not None else game_state.players[index]
+            for index, player in enumerate(self.players)
+        )),
+        starting_points=game_state.starting_points,
+        hand=counters.hand,
+        repeat=counters.repeat,
+        bonus_honba=counters.bonus_honba,
+        bonus_riichi=counters.bonus_riichi,
     )
-    offset, game_state = ClientGameStateStruct.unpack(buffer, offset)
-    return offset, (draw_hand, tenpai, points) + game_state
 
-  @staticmethod
-  def _size(cls):
-    return super()._size(cls) + ClientGameStateStruct.size()
+
+class HelloServerPacket(Packet):
+  id = 115
+  fields = (
+      ('version', UINT8),
+      ('capabilities', UINT8),
+  )
+
+  def __init__(self, version: int, capabilities: int):
+    self.version = version
+    self.capabilities = capabilities
 
 
+class PingServerPacket(Packet):
+  id = 116
+  fields = (
+      ('stamp', UINT32),
+  )
+
+  def __init__(self, stamp: int):
+    self.stamp = stamp
+
+
+class PongServerPacket(Packet):
+  id = 117
+  fields = (
+      ('stamp', UINT32),
+  )
+
+  def __init__(self, stamp: int):
+    self.stamp = stamp
+
+
+class ResumeTokenServerPacket(Packet):
+  id = 118
+  fields = (
+      ('token', Bytes(RESUME_TOKEN_SIZE)),
+  )
+
+  def __init__(self, token: bytes):
+    self.token = token
+
+
+structs: list = [
+    LengthStruct,
+    PacketIdStruct,
+    PlayerStruct,
+    GameCountersStruct,
+    GameStateStruct,
+    ClientGameStateStruct,
+]
+
 packets: set = {
     BroadcastClientPacket,
     SetupPlayerWindClientPacket,
@@ -513,6 +590,12 @@ packets: set = {
     RonScoreClientPacket,
     DrawClientPacket,
     RedrawClientPacket,
+    GameStateRequestClientPacket,
+    HelloClientPacket,
+    PingClientPacket,
+    PongClientPacket,
+    ResumeClientPacket,
+    JoinTableClientPacket,
 
     BroadcastServerPacket,
     LobbyPlayersServerPacket,
@@ -521,12 +604,18 @@ packets: set = {
     SetupPlayerCountErrorServerPacket,
     GameStateServerPacket,
     DrawTenpaiServerPacket,
+    RedrawServerPacket,
     RonWindServerPacket,
     RonScoreServerPacket,
     GameReconnectStatusServerPacket,
     TsumoServerPacket,
     RonServerPacket,
     DrawServerPacket,
+    GameStateDeltaServerPacket,
+    HelloServerPacket,
+    PingServerPacket,
+    PongServerPacket,
+    ResumeTokenServerPacket,
 }
 assert (len({
     packet.id
@@ -534,49 +623,347 @@ assert (len({
 }) == len(packets))
 
 
-def find_packet(id):
-  for packet in packets:
-    if packet.id == id:
-      return packet
+def register_struct(cls):
+  schema.compile_struct(cls)
+  if issubclass(cls, GameStatePacket):
+    cls.player_index_offset = schema.offset(cls, 'game_state.player_index')
+
+
+for cls in structs:
+  register_struct(cls)
 
-  raise ValueError(id)
+for cls in packets:
+  register_struct(cls)
+
+packet_lookup: dict[int, type[Packet]] = {
+    packet.id: packet
+    for packet in packets
+}
+
+
+def find_packet(id):
+  try:
+    return packet_lookup[id]
+  except KeyError:
+    raise ValueError(id)
 
 
 def unpack_packet(buffer: bytes, offset=0) -> Packet:
-  offset, (id,) = PacketIdStruct.unpack(buffer, offset)
-  return find_packet(id).from_data(buffer, offset)
+  return find_packet(buffer[offset]).from_data(buffer, offset + PacketIdStruct.size())
+
+
+BATCH_ID = 255
+BATCH_HEADER_SIZE = 5
+MAX_BATCH_ENTRY_SIZE = 255
+MAX_PACKET_SIZE = 1024
+DECODE_ERRORS = (ValueError, IndexError, StructError)
+
+
+def unpack_packets(frame: memoryview):
+  if frame[0] != BATCH_ID:
+    yield unpack_packet(frame)
+    return
+
+  offset = PacketIdStruct.size()
+  while offset < len(frame):
+    length = frame[offset]
+    if not length or offset + 1 + length > len(frame):
+      raise ValueError(length)
+    yield unpack_packet(frame, offset + 1)
+    offset += 1 + length
+
+
+def frame_size(packet: Packet) -> int:
+  return LengthStruct.size() + PacketIdStruct.size() + packet.size()
+
+
+def pack_frame(buffer: bytearray, offset: int, packet: Packet) -> int:
+  header_size = LengthStruct.size()
+  LengthStruct.codec.pack_into(buffer, offset, PacketIdStruct.size() + packet.size())
+  buffer[offset + header_size] = packet.id
+  return packet.pack(buffer, offset + header_size + PacketIdStruct.size())
+
+
+class PacketBuffer:
+  def __init__(self, size=64):
+    self.buffer = bytearray(size)
+    self.view = memoryview(self.buffer)
+
+  def reserve(self, size: int):
+    capacity = len(self.buffer)
+    if size <= capacity:
+      return
+
+    while capacity < size:
+      capacity *= 2
+    self.buffer = bytearray(capacity)
+    self.view = memoryview(self.buffer)
+
+  def pack(self, packet: Packet) -> memoryview:
+    self.reserve(frame_size(packet))
+    return self.view[:pack_frame(self.buffer, 0, packet)]
 
 
-def send_packet(_socket: socket.socket, packet: Packet):
-  size = PacketIdStruct.size() + packet.size()
-  buffer = bytearray(LengthStruct.size() + PacketIdStruct.size() + packet.size())
-  offset = LengthStruct(size).pack(buffer)
-  offset = PacketIdStruct(packet.id).pack(buffer, offset)
-  offset = packet.pack(buffer, offset)
-  send_data(_socket, buffer)
+class PacketFrame:
+  def __init__(self, packet: Packet, buffer: PacketBuffer | None = None):
+    self.packet = packet
+    self.data = (buffer or PacketBuffer()).pack(packet)
+    if isinstance(packet, GameStatePacket):
+      self.player_index_offset = LengthStruct.size() + PacketIdStruct.size() + packet.player_index_offset
+    else:
+      self.player_index_offset = None
 
+  def set_player_index(self, player_index: int):
+    if self.player_index_offset is not None:
+      self.data[self.player_index_offset] = player_index
 
-def send_data(socket: socket.socket, data: bytes):
+  def to_packet(self) -> Packet:
+    if self.player_index_offset is None:
+      return self.packet
+    return unpack_packet(self.data, LengthStruct.size())
+
+
+def join_multicast(_socket: socket.socket, group: str):
+  membership = bytes([int(part) for part in group.split('.')]) + bytes(4)
+  _socket.setsockopt(IPPROTO_IP, IP_ADD_MEMBERSHIP, membership)
+
+
+def set_multicast_ttl(_socket: socket.socket, ttl: int):
+  if IP_MULTICAST_TTL is not None:
+    _socket.setsockopt(IPPROTO_IP, IP_MULTICAST_TTL, ttl)
+
+
+def set_nodelay(_socket: socket.socket):
+  if TCP_NODELAY is None:
+    return
+
+  try:
+    _socket.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+  except OSError as e:
+    print(e)
+
+
+def send_packet(_socket: socket.socket, packet: Packet, buffer: PacketBuffer | None = None):
+  if buffer is None:
+    buffer = PacketBuffer()
+  send_data(_socket, buffer.pack(packet))
+
+
+def would_block(e: OSError):
+  return e.args[0] in (errno.EAGAIN, EWOULDBLOCK)
+
+
+def send_data(socket: socket.socket, data: memoryview):
   data_sent = 0
   while data_sent < len(data):
-    data_sent += socket.send(data[data_sent:])
+    data_sent += socket.send(data[data_sent:] if data_sent else data)
 
 
-def send_packet_to(_socket: socket.socket, packet: Packet, address: Address):
-  size = PacketIdStruct.size() + packet.size()
-  buffer = bytearray(LengthStruct.size() + PacketIdStruct.size() + packet.size())
-  offset = LengthStruct(size).pack(buffer)
-  offset = PacketIdStruct(packet.id).pack(buffer, offset)
-  offset = packet.pack(buffer, offset)
-  send_data_to(_socket, buffer, address)
+def send_packet_to(_socket: socket.socket, packet: Packet, address: Address, buffer: PacketBuffer | None = None):
+  if buffer is None:
+    buffer = PacketBuffer()
+  send_data_to(_socket, buffer.pack(packet), address)
 
 
-def send_data_to(socket: socket.socket, data: bytes, address: Address):
-  data_sent = 0
+def send_data_to(socket: socket.socket, data: memoryview, address: Address):
+  data_sent = socket.sendto(data, address)
   while data_sent < len(data):
     data_sent += socket.sendto(data[data_sent:], address)
 
 
+def recv_into(socket: socket.socket, buffer: memoryview) -> int | None:
+  if hasattr(socket, 'recv_into'):
+    return socket.recv_into(buffer)
+  return socket.readinto(buffer)
+
+
+class PacketReader:
+  def __init__(self, size=256):
+    self.buffer = bytearray(size)
+    self.view = memoryview(self.buffer)
+    self.start = 0
+    self.end = 0
+
+  def compact(self):
+    pending = self.end - self.start
+    if self.start:
+      self.view[:pending] = self.view[self.start:self.end]
+      self.start = 0
+      self.end = pending
+
+    if pending == len(self.buffer):
+      buffer = bytearray(len(self.buffer) * 2)
+      buffer[:pending] = self.view[:pending]
+      self.buffer = buffer
+      self.view = memoryview(buffer)
+
+  def feed(self, data: bytes):
+    if len(self.buffer) - self.end < len(data):
+      self.compact()
+    while len(self.buffer) - self.end < len(data):
+      buffer = bytearray(len(self.buffer) * 2)
+      buffer[:self.end] = self.view[:self.end]
+      self.buffer = buffer
+      self.view = memoryview(buffer)
+
+    self.view[self.end:self.end + len(data)] = data
+    self.end += len(data)
+
+  def read(self, _socket: socket.socket) -> bool:
+    if self.start == self.end:
+      self.start = self.end = 0
+    elif self.end == len(self.buffer):
+      self.compact()
+
+    try:
+      count = recv_into(_socket, self.view[self.end:])
+    except OSError as e:
+      return would_block(e)
+
+    if count is None:
+      return True
+    elif not count:
+      return False
+
+    self.end += count
+    return True
+
+  def frames(self):
+    header_size = LengthStruct.size()
+    while self.end - self.start >= header_size:
+      (length,) = LengthStruct.codec.unpack_from(self.buffer, self.start)
+      if not length or length > MAX_PACKET_SIZE:
+        raise ValueError(length)
+
+      frame_start = self.start + header_size
+      frame_end = frame_start + length
+      if frame_end > self.end:
+        return
+
+      self.start = frame_end
+      yield self.view[frame_start:frame_end]
+
+  def packets(self):
+    for frame in self.frames():
+      for packet in unpack_packets(frame):
+        yield packet
+
+
+class QueueFullError(Exception):
+  pass
+
+
+class PacketWriter:
+  def __init__(self, size=64, limit=1024, batching=False):
+    self.buffer = bytearray(size)
+    self.view = memoryview(self.buffer)
+    self.start = 0
+    self.end = 0
+    self.limit = limit
+    self.batching = batching
+    self.batch: int | None = None
+    self.batch_count = 0
+
+  def __len__(self):
+    return self.end - self.start
+
+  def reserve(self, size: int) -> int:
+    if self.start == self.end:
+      self.start = self.end = 0
+    if self.end + size <= len(self.buffer):
+      return self.end
+
+    pending = self.end - self.start
+    if pending + size > self.limit:
+      raise QueueFullError()
+
+    if self.start:
+      self.view[:pending] = self.view[self.start:self.end]
+      if self.batch is not None:
+        self.batch -= self.start
+      self.start = 0
+      self.end = pending
+
+    capacity = len(self.buffer)
+    if pending + size > capacity:
+      while capacity < pending + size:
+        capacity *= 2
+      buffer = bytearray(min(capacity, self.limit))
+      buffer[:pending] = self.view[:pending]
+      self.buffer = buffer
+      self.view = memoryview(buffer)
+
+    return self.end
+
+  def begin(self, size: int) -> int:
+    if self.batching and size > MAX_BATCH_ENTRY_SIZE:
+      self.seal()
+
+    if not self.batching or size > MAX_BATCH_ENTRY_SIZE:
+      offset = self.reserve(LengthStruct.size() + size)
+      LengthStruct.codec.pack_into(self.buffer, offset, size)
+      return offset + LengthStruct.size()
+
+    if self.batch is None:
+      offset = self.reserve(BATCH_HEADER_SIZE + 1 + size)
+      self.batch = offset
+      self.batch_count = 0
+      self.end = offset + BATCH_HEADER_SIZE
+    else:
+      self.reserve(1 + size)
+
+    self.buffer[self.end] = size
+    self.batch_count += 1
+    return self.end + 1
+
+  def seal(self):
+    batch = self.batch
+    if batch is None:
+      return
+
+    self.batch = None
+    if self.batch_count > 1:
+      LengthStruct.codec.pack_into(self.buffer, batch, self.end - batch - LengthStruct.size())
+      self.buffer[batch + LengthStruct.size()] = BATCH_ID
+      return
+
+    frame = batch + BATCH_HEADER_SIZE + 1 - LengthStruct.size()
+    LengthStruct.codec.pack_into(self.buffer, frame, self.end - frame - LengthStruct.size())
+    if batch == self.start:
+      self.start = frame
+    else:
+      self.view[batch:self.end - (frame - batch)] = self.view[frame:self.end]
+      self.end -= frame - batch
+
+  def write(self, data: memoryview):
+    header_size = LengthStruct.size()
+    offset = self.begin(len(data) - header_size)
+    self.end = offset + len(data) - header_size
+    self.view[offset:self.end] = data[header_size:]
+
+  def write_packet(self, packet: Packet):
+    offset = self.begin(PacketIdStruct.size() + packet.size())
+    self.buffer[offset] = packet.id
+    self.end = packet.pack(self.buffer, offset + PacketIdStruct.size())
+
+  def flush(self, _socket: socket.socket) -> bool:
+    self.seal()
+    while self.start < self.end:
+      try:
+        data_sent = _socket.send(self.view[self.start:self.end])
+      except OSError as e:
+        if would_block(e):
+          return False
+        raise
+
+      if not data_sent:
+        return False
+      self.start += data_sent
+
+    self.start = self.end = 0
+    return True
+
+
 def read_packet(_socket: socket.socket):
   try:
     data = recv_data(_socket)
@@ -592,7 +979,7 @@ def recv_data(socket: socket.socket):
   data = recvall(socket, LengthStruct.size())
   if not data:
     return None
-  _, (msg_length,) = LengthStruct.unpack(data)
+  (msg_length,) = LengthStruct.codec.unpack_from(data)
   return recvall(socket, msg_length)
 
 
@@ -618,6 +1005,5 @@ def read_packet_from(_socket: socket.socket):
 
 
 def recv_data_from(socket: socket.socket):
-  length_size = LengthStruct.size()
-  data, addr = socket.recvfrom(length_size + PacketIdStruct.size())
-  return data[length_size:], addr
+  data, addr = socket.recvfrom(256)
+  return data[LengthStruct.size():], addr
@@ -1,6 +1,26 @@
 import select
 from typing import Any, Callable
 
+try:
+  from time import ticks_add, ticks_diff, ticks_ms
+except ImportError:
+  import time
+
+  TICKS_PERIOD = 1 << 30
+  TICKS_MAX = TICKS_PERIOD - 1
+  TICKS_HALF = TICKS_PERIOD // 2
+
+  def ticks_ms() -> int:
+    return int(time.monotonic() * 1000) & TICKS_MAX
+
+  def ticks_add(ticks: int, delta: int) -> int:
+    return (ticks + delta) & TICKS_MAX
+
+  def ticks_diff(ticks1: int, ticks2: int) -> int:
+    return ((ticks1 - ticks2 + TICKS_HALF) & TICKS_MAX) - TICKS_HALF
+
+INPUT_POLL_INTERVAL = 50
+
 
 class EventCallback:
   def __init__(self, fd: Any, callback: Callable[[Any, int], None]):
@@ -11,27 +31,108 @@ class EventCallback:
     self.callback(self.fd, event)
 
 
-class Poll:
-  lookup: dict[int, EventCallback] = {}
+class TimerHandle:
+  def __init__(self, deadline: int, callback: Callable, args: tuple):
+    self.deadline = deadline
+    self.callback = callback
+    self.args = args
+    self.cancelled = False
+
+  def cancel(self):
+    self.cancelled = True
+
 
+class Poll:
   def __init__(self):
     self._poll = select.poll()
+    self.lookup: dict[int, EventCallback] = {}
+    self.pending: list[tuple[Callable, tuple]] = []
+    self.timers: list[TimerHandle] = []
+    self.idle_ms = 0
+    self.busy_ms = 0
+    self.tick = ticks_ms()
 
   def register(self, fd: Any, eventmask: int, callback: Callable[[Any, int], None]):
     self._poll.register(fd, eventmask)
     self.lookup[id(fd)] = EventCallback(fd, callback)
 
+  def modify(self, fd: Any, eventmask: int):
+    self._poll.modify(fd, eventmask)
+
   def unregister(self, fd: Any):
     self._poll.unregister(fd)
     del self.lookup[id(fd)]
 
-  def poll(self):
-    for (fd, event) in self._poll.ipoll(0):
-      event_callback = self.lookup.get(id(fd))
+  def next_timeout(self, timeout: int) -> int:
+    if self.pending:
+      return 0
+
+    now = ticks_ms()
+    for timer in self.timers:
+      if timer.cancelled:
+        continue
+
+      remaining = max(0, ticks_diff(timer.deadline, now))
+      if timeout < 0 or remaining < timeout:
+        timeout = remaining
+    return timeout
+
+  def poll(self, timeout=0):
+    timeout = self.next_timeout(timeout)
+    start = ticks_ms()
+    events = self.wait(timeout)
+    end = ticks_ms()
+    self.busy_ms += ticks_diff(start, self.tick)
+    self.idle_ms += ticks_diff(end, start)
+    self.tick = end
+
+    for (fd, event) in events:
+      event_callback = self.find(fd)
       if not event_callback:
         continue
       event_callback(event)
 
+    self.run_timers()
+    self.run_pending()
+
+  def wait(self, timeout: int):
+    return self._poll.ipoll(timeout)
+
+  def find(self, fd: Any):
+    return self.lookup.get(id(fd))
+
+  def reset_stats(self):
+    self.idle_ms = 0
+    self.busy_ms = 0
+
+  def call_soon(self, callback: Callable, *args):
+    self.pending.append((callback, args))
+
+  def call_later(self, delay: int, callback: Callable, *args) -> TimerHandle:
+    timer = TimerHandle(ticks_add(ticks_ms(), delay), callback, args)
+    self.timers.append(timer)
+    return timer
+
+  def run_timers(self):
+    if not self.timers:
+      return
+
+    now = ticks_ms()
+    due = [
+        timer
+        for timer in self.timers
+        if timer.cancelled or ticks_diff(timer.deadline, now) <= 0
+    ]
+    for timer in due:
+      self.timers.remove(timer)
+      if not timer.cancelled:
+        timer.callback(*timer.args)
+
+  def run_pending(self):
+    while self.pending:
+      callback, args = self.pending.pop(0)
+      callback(*args)
+
   def close(self):
     for event_callback in list(self.lookup.values()):
       self.unregister(event_callback.fd)
@@ -0,0 +1,254 @@
+import struct
+
+StructError = getattr(struct, 'error', ValueError)
+
+
+class Codec:
+  def __init__(self, fmt: str):
+    self.format = fmt
+    self.size = struct.calcsize(fmt)
+
+  def pack_into(self, buffer: bytearray, offset: int, *data):
+    struct.pack_into(self.format, buffer, offset, *data)
+
+  def unpack_from(self, buffer: bytes, offset=0) -> tuple:
+    return struct.unpack_from(self.format, buffer, offset)
+
+
+def compile_codec(fmt: str) -> Codec:
+  if hasattr(struct, 'Struct'):
+    return struct.Struct(fmt)
+  return Codec(fmt)
+
+
+def pack_bits(values) -> int:
+  value = 0
+  for index in values:
+    value |= (1 << index)
+  return value
+
+
+def unpack_bits(value: int, count: int) -> set[int]:
+  return {
+      index
+      for index in range(count)
+      if (value >> index & 1) != 0
+  }
+
+
+def unpack_text(value: bytes) -> str:
+  end = value.find(b'\0')
+  return (value if end < 0 else value[:end]).decode()
+
+
+class Type:
+  pass
+
+
+class Int(Type):
+  def __init__(self, fmt: str):
+    self.fmt = fmt
+    self.size = struct.calcsize(fmt)
+    self.align = self.size
+
+  def pack(self, gen: 'Codegen', expr: str, path: str):
+    gen.field(self.fmt, self.size, self.align, expr, path)
+
+  def unpack(self, gen: 'Codegen') -> str:
+    return gen.value(self.size, self.align)
+
+
+class Bool(Int):
+  def __init__(self):
+    super().__init__('B')
+
+  def pack(self, gen: 'Codegen', expr: str, path: str):
+    super().pack(gen, f'1 if {expr} else 0', path)
+
+  def unpack(self, gen: 'Codegen') -> str:
+    return f'{super().unpack(gen)} != 0'
+
+
+class Bits(Int):
+  def __init__(self, count: int):
+    super().__init__('B')
+    self.count = count
+
+  def pack(self, gen: 'Codegen', expr: str, path: str):
+    super().pack(gen, f'pack_bits({expr})', path)
+
+  def unpack(self, gen: 'Codegen') -> str:
+    return f'unpack_bits({super().unpack(gen)}, {self.count})'
+
+
+class Text(Int):
+  def __init__(self, size: int):
+    super().__init__(f'{size}s')
+    self.align = 1
+
+  def pack(self, gen: 'Codegen', expr: str, path: str):
+    super().pack(gen, f'{expr}.encode()', path)
+
+  def unpack(self, gen: 'Codegen') -> str:
+    return f'unpack_text({super().unpack(gen)})'
+
+
+class Bytes(Int):
+  def __init__(self, size: int):
+    super().__init__(f'{size}s')
+    self.align = 1
+
+
+class Array(Type):
+  def __init__(self, item: Type, count: int):
+    self.item = item
+    self.count = count
+
+  def pack(self, gen: 'Codegen', expr: str, path: str):
+    expr = gen.local(expr)
+    for index in range(self.count):
+      self.item.pack(gen, f'{expr}[{index}]', f'{path}.{index}')
+
+  def unpack(self, gen: 'Codegen') -> str:
+    items = ', '.join([
+        self.item.unpack(gen)
+        for _ in range(self.count)
+    ])
+    return f'({items},)'
+
+
+class Record(Type):
+  def __init__(self, cls, fields: tuple | None = None):
+    self.cls = cls
+    self.fields = cls.fields if fields is None else fields
+
+  def pack(self, gen: 'Codegen', expr: str, path: str):
+    expr = gen.local(expr)
+    base = gen.begin()
+    for name, field in self.fields:
+      field.pack(gen, f'{expr}.{name}', f'{path}.{name}' if path else name)
+    gen.end(base)
+
+  def unpack(self, gen: 'Codegen') -> str:
+    base = gen.begin()
+    args = ', '.join([
+        f'{name}={field.unpack(gen)}'
+        for name, field in self.fields
+    ])
+    gen.end(base)
+    return f'{gen.ref(self.cls)}({args})'
+
+
+INT8 = Int('b')
+UINT8 = Int('B')
+INT16 = Int('h')
+UINT16 = Int('H')
+UINT32 = Int('I')
+BOOL = Bool()
+
+
+class Codegen:
+  def __init__(self):
+    self.fmt: list[str] = []
+    self.args: list[str] = []
+    self.lines: list[str] = []
+    self.offsets: dict[str, int] = {}
+    self.names: dict = {}
+    self.size = 0
+    self.base = 0
+    self.count = 0
+
+  def begin(self) -> int:
+    base = self.base
+    self.base = self.size
+    return base
+
+  def end(self, base: int):
+    self.base = base
+
+  def pad(self, align: int):
+    while (self.size - self.base) % align:
+      self.fmt.append('B')
+      self.args.append('0')
+      self.size += 1
+      self.count += 1
+
+  def field(self, fmt: str, size: int, align: int, expr: str, path: str):
+    self.pad(align)
+    self.offsets[path] = self.size
+    self.fmt.append(fmt)
+    self.args.append(expr)
+    self.size += size
+
+  def value(self, size: int, align: int) -> str:
+    while (self.size - self.base) % align:
+      self.size += 1
+      self.count += 1
+    self.size += size
+    self.count += 1
+    return f'u{self.count - 1}'
+
+  def local(self, expr: str) -> str:
+    if '.' not in expr and '[' not in expr:
+      return expr
+    name = f'v{len(self.lines)}'
+    self.lines.append(f'  {name} = {expr}')
+    return name
+
+  def ref(self, value) -> str:
+    name = f'c{len(self.names)}'
+    self.names[name] = value
+    return name
+
+
+def layout(cls) -> Codegen:
+  gen = Codegen()
+  Record(cls).pack(gen, 'self', '')
+  return gen
+
+
+def offset(cls, path: str) -> int:
+  return layout(cls).offsets[path]
+
+
+def compile_struct(cls):
+  gen = layout(cls)
+  fmt = getattr(cls, 'byteorder', '<') + ''.join(gen.fmt)
+  codec = compile_codec(fmt)
+  cls.codec = codec
+  cls.fixed_size = gen.size
+
+  pack_lines = ['def pack(self, buffer, offset=0):'] + gen.lines
+  if not gen.args:
+    pack_lines.append('  return offset')
+  elif isinstance(codec, Codec):
+    pack_lines.append(f'  pack_into(fmt, buffer, offset, {", ".join(gen.args)})')
+    pack_lines.append(f'  return offset + {gen.size}')
+  else:
+    pack_lines.append(f'  pack_into(buffer, offset, {", ".join(gen.args)})')
+    pack_lines.append(f'  return offset + {gen.size}')
+
+  gen.size = gen.count = 0
+  result = Record(cls).unpack(gen)
+  unpack_lines = ['def from_data(buffer, offset=0):']
+  if gen.count:
+    values = ', '.join([f'u{index}' for index in range(gen.count)])
+    unpack_lines.append(f'  {values}, = unpack_from(buffer, offset)')
+  unpack_lines.append(f'  return {result}')
+
+  namespace = {
+      'fmt': fmt,
+      'pack_into': struct.pack_into if isinstance(codec, Codec) else codec.pack_into,
+      'unpack_from': codec.unpack_from,
+      'pack_bits': pack_bits,
+      'unpack_bits': unpack_bits,
+      'unpack_text': unpack_text,
+  }
+  namespace.update(gen.names)
+  exec('\n'.join(pack_lines + unpack_lines), namespace)
+  if 'pack' not in cls.__dict__:
+    cls.pack = namespace['pack']
+  decode = staticmethod(namespace['from_data'])
+  cls.decode = decode
+  if 'from_data' not in cls.__dict__:
+    cls.from_data = decode
@@ -1,52 +1,88 @@
 import select
 import socket
-import typing
 
 from mahjong2040.packets import (
+    BEACON_PORT_OFFSET,
+    BROADCAST_ADDRESS,
+    CAP_HEARTBEAT,
+    CAPABILITIES,
+    DECODE_ERRORS,
+    HEARTBEAT_INTERVAL,
+    HEARTBEAT_MISSES,
+    PROTOCOL_VERSION,
+    SO_BROADCAST,
     BroadcastClientPacket,
-    BroadcastServerPacket,
+    HelloClientPacket,
+    HelloServerPacket,
+    JoinTableClientPacket,
     Packet,
-    read_packet,
+    PacketBuffer,
+    PacketFrame,
+    PingClientPacket,
+    PingServerPacket,
+    PongClientPacket,
+    PongServerPacket,
+    ResumeClientPacket,
     read_packet_from,
-    send_packet_to,
+    send_data_to,
+    set_multicast_ttl,
+    set_nodelay,
 )
-from mahjong2040.poll import Poll
+from mahjong2040.poll import Poll, TimerHandle, ticks_add, ticks_diff, ticks_ms
 from mahjong2040.shared import GamePlayerMixin, GameState
 
-from .shared import RemoteServerClient, ServerClient
+from .shared import CLIENT_EVENTS, RemoteServerClient, ServerClient
+from .table import Table
 
-if typing.TYPE_CHECKING:
-  from .states.base import ServerState
+BEACON_INTERVALS = (250, 500, 1000, 2000, 4000, 8000)
+SEAT_TIMEOUT = 250
 
 
 class Server:
-  def __init__(self, poll: Poll, game_state: GameState[GamePlayerMixin] | None = None):
-    from .states.lobby import LobbyServerState
-
+  def __init__(
+      self,
+      poll: Poll,
+      game_state: GameState[GamePlayerMixin] | None = None,
+      name='',
+      heartbeat_interval=HEARTBEAT_INTERVAL,
+      heartbeat_misses=HEARTBEAT_MISSES,
+      tables=1,
+      table_ids: list[int] | None = None,
+  ):
     self.poll = poll
+    self.name = name
+    self.heartbeat_interval = heartbeat_interval
+    self.heartbeat_misses = heartbeat_misses
+    self.heartbeat_timer: TimerHandle | None = None
+    self.beacon_address = (BROADCAST_ADDRESS, 0)
+    self.beacons: dict[int, tuple[int, int]] = {}
+    self.beacon_deadline = 0
+    self.beacon_timer: TimerHandle | None = None
     self.broadcast: socket.socket | None = None
     self.socket: socket.socket | None = None
-    self.clients: list[ServerClient] = []
-    self._child: ServerState | None = None
-    self.child = LobbyServerState(self, game_state)
-
-  @property
-  def child(self):
-    return self._child
-
-  @child.setter
-  def child(self, value: ServerState):
-    if self._child is value:
-      return
+    self.sockets: dict[int, RemoteServerClient] = {}
+    self.buffer = PacketBuffer()
+    self.tables: dict[int, Table] = {
+        index: Table(
+            self,
+            index,
+            game_state if index == 0 else None,
+            name if tables == 1 else f'{name or "Table"} {index + 1}',
+        )
+        for index in (range(tables) if table_ids is None else table_ids)
+    }
 
-    self._child = value
-    self._child.init()
-
-  def start(self, port: int):
+  def start(self, port: int, multicast_group: str | None = None, multicast_ttl=1, backlog: int | None = None):
     self.broadcast = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     self.broadcast.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    self.broadcast.setsockopt(socket.SOL_SOCKET, SO_BROADCAST, 1)
     self.poll.register(self.broadcast, select.POLLIN, self.on_broadcast_data)
     self.broadcast.bind(('', port))
+    if multicast_group:
+      set_multicast_ttl(self.broadcast, multicast_ttl)
+      self.beacon_address = (multicast_group, port + BEACON_PORT_OFFSET)
+    else:
+      self.beacon_address = (BROADCAST_ADDRESS, port + BEACON_PORT_OFFSET)
 
     self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -54,9 +90,22 @@ class Server:
     self.socket.bind(('', port))
 
     print(f'Server is listing on port {port}...')
-    self.socket.listen()
+    if backlog is None:
+      self.socket.listen()
+    else:
+      self.socket.listen(backlog)
+    self.announce()
+    self.heartbeat_timer = self.poll.call_later(self.heartbeat_interval, self.heartbeat)
 
   def close(self):
+    if self.beacon_timer is not None:
+      self.beacon_timer.cancel()
+      self.beacon_timer = None
+
+    if self.heartbeat_timer is not None:
+      self.heartbeat_timer.cancel()
+      self.heartbeat_timer = None
+
     if self.broadcast is not None:
       self.broadcast.close()
 
@@ -67,63 +116,199 @@ class Server:
     if event & select.POLLIN:
       packet, address = read_packet_from(_socket)
       if isinstance(packet, BroadcastClientPacket) and address:
-        send_packet_to(_socket, BroadcastServerPacket(), address)
+        for data in self.broadcast_replies():
+          send_data_to(_socket, data, address)
+
+  def announce(self, table: int | None = None):
+    if self.broadcast is None:
+      return
+
+    now = ticks_ms()
+    for index in (self.tables if table is None else (table,)):
+      self.beacons[index] = (now, 0)
+    self.schedule_beacon(now)
+
+  def schedule_beacon(self, deadline: int):
+    if self.beacon_timer is not None:
+      if ticks_diff(deadline, self.beacon_deadline) >= 0:
+        return
+      self.beacon_timer.cancel()
+
+    self.beacon_deadline = deadline
+    self.beacon_timer = self.poll.call_later(max(0, ticks_diff(deadline, ticks_ms())), self.send_beacon)
+
+  def send_beacon(self):
+    self.beacon_timer = None
+    if self.broadcast is None:
+      return
+
+    now = ticks_ms()
+    deadline = None
+    for index, (due, step) in list(self.beacons.items()):
+      if ticks_diff(due, now) <= 0:
+        data = self.broadcast_reply(index)
+        if data is None:
+          del self.beacons[index]
+          continue
+
+        try:
+          send_data_to(self.broadcast, data, self.beacon_address)
+        except OSError as e:
+          print(self.__class__.__name__, e)
+
+        due = ticks_add(now, BEACON_INTERVALS[min(step, len(BEACON_INTERVALS) - 1)])
+        self.beacons[index] = (due, step + 1)
+
+      if deadline is None or ticks_diff(due, deadline) < 0:
+        deadline = due
+
+    if deadline is not None:
+      self.schedule_beacon(deadline)
+
+  def broadcast_reply(self, index: int) -> bytes | None:
+    table = self.tables.get(index)
+    return None if table is None else table.broadcast_reply()
+
+  def broadcast_replies(self):
+    return [
+        table.broadcast_reply()
+        for table in self.tables.values()
+    ]
+
+  def heartbeat(self):
+    now = ticks_ms()
+    timeout = self.heartbeat_interval * self.heartbeat_misses
+    frame: PacketFrame | None = None
+    for client in self.sockets.values():
+      if client.closed:
+        continue
+      if not client.capabilities & CAP_HEARTBEAT:
+        continue
+
+      if ticks_diff(now, client.last_seen) > timeout:
+        print(self.__class__.__name__, 'heartbeat timeout')
+        client.close()
+        continue
+
+      if frame is None:
+        frame = PacketFrame(PingServerPacket(now), self.buffer)
+      client.send_frame(frame)
+
+    self.heartbeat_timer = self.poll.call_later(self.heartbeat_interval, self.heartbeat)
+
+  def save_game_state(self, table: int, game_state: GameState):
+    pass
 
   def client_from_socket(self, _socket: socket.socket):
-    try:
-      return next((
-          client
-          for client in self.clients
-          if isinstance(client, RemoteServerClient) and client._socket == _socket
-      ))
-    except StopIteration:
-      return None
-
-  def add_client(self, client: ServerClient):
-    self.clients.append(client)
-    if self.child:
-      self.child.on_client_join(client)
+    return self.sockets.get(id(_socket))
+
+  def add_client(self, client: ServerClient, table=0):
+    self.tables[table].add_client(client)
 
   def remove_client(self, client: ServerClient):
-    self.clients.remove(client)
-    if self.child:
-      self.child.on_client_leave(client)
+    if client.seat_timer is not None:
+      client.seat_timer.cancel()
+      client.seat_timer = None
+
+    if client.table is not None:
+      client.table.remove_client(client)
+
+  def seat_client(self, client: ServerClient, table: Table):
+    self.remove_client(client)
+    table.add_client(client)
+
+  def on_seat_timeout(self, client: ServerClient):
+    client.seat_timer = None
+    if client.table is None:
+      self.add_client(client)
 
   def on_server_data(self, _socket: socket.socket, event: int):
     if event & select.POLLIN:
       client, _ = _socket.accept()
+      client.setblocking(False)
+      set_nodelay(client)
+      self.poll.register(client, CLIENT_EVENTS, self.on_client_data)
       self.on_client_connect(client)
-      self.poll.register(client, select.POLLIN | select.POLLERR | select.POLLHUP | 32, self.on_client_data)
 
   def on_client_data(self, _socket: socket.socket, event: int):
     if event & (select.POLLHUP | select.POLLERR | 32):
-      self.on_client_disconnect(_socket)
-    elif event & select.POLLIN:
-      packet = read_packet(_socket)
-      client = self.client_from_socket(_socket)
-      if client is None:
-        return
+      return self.on_client_disconnect(_socket)
 
-      if packet is None:
-        self.remove_client(client)
-        return
+    client = self.sockets.get(id(_socket))
+    if client is None or client.closed:
+      return
 
-      print(self.__class__.__name__, repr(packet))
-      self.on_client_packet(client, packet)
-    else:
-      print(event)
+    if event & select.POLLOUT:
+      client.flush()
+
+    if event & select.POLLIN:
+      if not client.reader.read(_socket):
+        return self.on_client_disconnect(_socket)
+      client.last_seen = ticks_ms()
+
+      try:
+        for packet in client.reader.packets():
+          print(self.__class__.__name__, repr(packet))
+          self.on_client_packet(client, packet)
+      except DECODE_ERRORS as e:
+        print(self.__class__.__name__, 'bad packet', repr(e))
+        self.on_client_disconnect(_socket)
 
   def on_client_connect(self, _socket: socket.socket):
-    self.add_client(RemoteServerClient(_socket))
+    client = RemoteServerClient(self, _socket)
+    self.sockets[id(_socket)] = client
+    client.seat_timer = self.poll.call_later(SEAT_TIMEOUT, self.on_seat_timeout, client)
 
   def on_client_disconnect(self, _socket: socket.socket):
-    client = self.client_from_socket(_socket)
+    client = self.sockets.pop(id(_socket), None)
     if client is not None:
+      client.closed = True
       self.remove_client(client)
 
     self.poll.unregister(_socket)
     _socket.close()
 
+  def on_client_hello(self, client: ServerClient, packet: HelloClientPacket):
+    capabilities = packet.capabilities & CAPABILITIES
+    client.send_packet(HelloServerPacket(PROTOCOL_VERSION, capabilities))
+    client.set_capabilities(capabilities)
+
+  def on_client_join_table(self, client: ServerClient, packet: JoinTableClientPacket):
+    table = self.tables.get(packet.table)
+    if table is None or client.table is table:
+      return
+    if client.table is not None and client.table.resume_seat(client) is not None:
+      return
+
+    self.seat_client(client, table)
+
+  def on_client_resume(self, client: ServerClient, packet: ResumeClientPacket):
+    client.resume_token = packet.token
+    for table in self.tables.values():
+      if table.resume_seat(client) is None:
+        continue
+
+      if client.table is not table:
+        self.seat_client(client, table)
+      return table.on_client_resume(client)
+
   def on_client_packet(self, client: ServerClient, packet: Packet):
-    if self.child:
-      self.child.on_client_packet(client, packet)
+    if isinstance(packet, HelloClientPacket):
+      return self.on_client_hello(client, packet)
+    elif isinstance(packet, JoinTableClientPacket):
+      return self.on_client_join_table(client, packet)
+    elif isinstance(packet, ResumeClientPacket):
+      return self.on_client_resume(client, packet)
+    elif isinstance(packet, PingClientPacket):
+      return client.send_packet(PongServerPacket(packet.stamp))
+    elif isinstance(packet, PongClientPacket):
+      if isinstance(client, RemoteServerClient):
+        client.rtt = ticks_diff(ticks_ms(), packet.stamp)
+      return
+
+    if client.seat_timer is not None:
+      client.seat_timer.cancel()
+      self.on_seat_timeout(client)
+
+    if client.table is not None:
+      client.table.on_client_packet(client, packet)
@@ -0,0 +1,76 @@
+import argparse
+import socket
+
+from mahjong2040.epoll import EPoll
+from mahjong2040.packets import HEARTBEAT_INTERVAL, HEARTBEAT_MISSES
+
+from . import Server
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Run a mahjong2040 server')
+  parser.add_argument('--port', type=int, default=1246, help='TCP and discovery port')
+  parser.add_argument('--tables', type=int, default=1, help='number of tables to serve')
+  parser.add_argument('--name', default='', help='name advertised to clients')
+  parser.add_argument('--multicast-group', help='announce on this multicast group instead of broadcast')
+  parser.add_argument('--multicast-ttl', type=int, default=1, help='multicast TTL')
+  parser.add_argument('--heartbeat-interval', type=int, default=HEARTBEAT_INTERVAL, help='milliseconds between pings')
+  parser.add_argument('--heartbeat-misses', type=int, default=HEARTBEAT_MISSES, help='missed pings before a client is dropped')
+  parser.add_argument('--backlog', type=int, default=1024, help='pending connections the listening socket queues')
+  parser.add_argument('--workers', type=int, default=1, help='worker processes to spread tables across')
+  parser.add_argument('--worker-fd', type=int, help=argparse.SUPPRESS)
+  parser.add_argument('--worker-tables', help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if not 1 <= args.tables <= 256:
+    parser.error('--tables must be between 1 and 256')
+  if args.workers < 1:
+    parser.error('--workers must be at least 1')
+
+  poll = EPoll()
+  if args.worker_fd is not None:
+    from .workers import WorkerServer
+
+    server = WorkerServer(
+        poll,
+        socket.socket(fileno=args.worker_fd),
+        name=args.name,
+        heartbeat_interval=args.heartbeat_interval,
+        heartbeat_misses=args.heartbeat_misses,
+        tables=args.tables,
+        table_ids=[int(table) for table in args.worker_tables.split(',')],
+    )
+  elif args.workers > 1:
+    from .workers import Dispatcher
+
+    server = Dispatcher(
+        poll,
+        name=args.name,
+        heartbeat_interval=args.heartbeat_interval,
+        heartbeat_misses=args.heartbeat_misses,
+        tables=args.tables,
+        workers=args.workers,
+    )
+  else:
+    server = Server(
+        poll,
+        name=args.name,
+        heartbeat_interval=args.heartbeat_interval,
+        heartbeat_misses=args.heartbeat_misses,
+        tables=args.tables,
+    )
+
+  if args.worker_fd is None:
+    server.start(args.port, args.multicast_group, args.multicast_ttl, args.backlog)
+  try:
+    while True:
+      poll.poll(-1)
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.close()
+    poll.close()
+
+
+if __name__ == '__main__':
+  main()
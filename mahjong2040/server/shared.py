@@ -1,29 +1,126 @@
+import select
 import socket
 import typing
 
-from mahjong2040.packets import Packet, send_packet
+from mahjong2040.packets import (
+    CAP_BATCH,
+    CAP_DELTA,
+    Packet,
+    PacketFrame,
+    PacketReader,
+    PacketWriter,
+    QueueFullError,
+)
+from mahjong2040.poll import TimerHandle, ticks_ms
 
 if typing.TYPE_CHECKING:
   from mahjong2040.client import Client
+  from mahjong2040.server import Server
+  from mahjong2040.server.table import Table
+
+CLIENT_EVENTS = select.POLLIN | select.POLLERR | select.POLLHUP | 32
 
 
 class ServerClient:
+  capabilities = 0
+  resume_token: bytes | None = None
+  seat: int | None = None
+  seat_timer: TimerHandle | None = None
+  table: 'Table | None' = None
+
+  def set_capabilities(self, capabilities: int):
+    self.capabilities = capabilities
+
   def send_packet(self, packet: Packet):
     pass
 
+  def send_frame(self, frame: PacketFrame):
+    self.send_packet(frame.to_packet())
+
+  def close(self):
+    pass
+
 
 class RemoteServerClient(ServerClient):
   _socket: socket.socket
 
-  def __init__(self, _socket: socket.socket):
+  def __init__(self, server: 'Server', _socket: socket.socket):
+    self.server = server
     self._socket = _socket
+    self.reader = PacketReader()
+    self.writer = PacketWriter()
+    self.waiting = False
+    self.flushing = False
+    self.closed = False
+    self.last_seen = ticks_ms()
+    self.rtt: int | None = None
+
+  def set_capabilities(self, capabilities: int):
+    super().set_capabilities(capabilities)
+    self.writer.batching = (capabilities & CAP_BATCH) != 0
 
   def send_packet(self, packet: Packet):
-    send_packet(self._socket, packet)
+    if self.closed:
+      return
+
+    try:
+      self.writer.write_packet(packet)
+    except QueueFullError:
+      return self.on_overflow()
+    self.schedule_flush()
+
+  def send_frame(self, frame: PacketFrame):
+    if self.closed:
+      return
+
+    try:
+      self.writer.write(frame.data)
+    except QueueFullError:
+      return self.on_overflow()
+    self.schedule_flush()
+
+  def schedule_flush(self):
+    if self.flushing:
+      return
+
+    self.flushing = True
+    self.server.poll.call_soon(self.flush)
+
+  def flush(self):
+    self.flushing = False
+    if self.closed:
+      return
+
+    try:
+      waiting = not self.writer.flush(self._socket)
+    except OSError as e:
+      print(self.__class__.__name__, e)
+      return self.close()
+
+    if waiting != self.waiting:
+      self.waiting = waiting
+      self.server.poll.modify(self._socket, (CLIENT_EVENTS | select.POLLOUT) if waiting else CLIENT_EVENTS)
+
+  def on_overflow(self):
+    print(self.__class__.__name__, 'queue full')
+    self.close()
+
+  def close(self):
+    if self.closed:
+      return
+
+    self.closed = True
+    self.server.poll.call_soon(self.disconnect)
+
+  def disconnect(self):
+    if self.server.sockets.get(id(self._socket)) is self:
+      self.server.on_client_disconnect(self._socket)
 
 
 class LocalServerClient(ServerClient):
-  def __init__(self, client: Client):
+  capabilities = CAP_DELTA
+
+  def __init__(self, client: 'Client'):
     self.client = client
 
   def send_packet(self, packet: Packet):
@@ -1,16 +1,16 @@
 import typing
 
-from mahjong2040.packets import Packet
-from mahjong2040.shared import RIICHI_POINTS, GamePlayerMixin
+from mahjong2040.packets import Packet, PacketFrame
+from mahjong2040.shared import RIICHI_POINTS, GamePlayerMixin, GameState, Phase
 
 if typing.TYPE_CHECKING:
-  from mahjong2040.server import Server
+  from mahjong2040.server.table import Table
 
   from .shared import ServerClient
 
 
 class GamePlayer(GamePlayerMixin):
-  def __init__(self, client: ServerClient, points: int, riichi: bool = False):
+  def __init__(self, client: 'ServerClient', points: int, riichi: bool = False):
     self.client = client
     self.points = points
     self.riichi = riichi
@@ -27,9 +27,15 @@ class GamePlayer(GamePlayerMixin):
   def send_packet(self, packet: Packet):
     self.client.send_packet(packet)
 
+  def send_frame(self, frame: PacketFrame):
+    self.client.send_frame(frame)
+
 
 class ServerState:
-  def __init__(self, server: Server):
+  phase = Phase.LOBBY
+  game_state: GameState | None = None
+
+  def __init__(self, server: 'Table'):
     print(self.__class__.__name__)
     self.server = server
 
@@ -48,11 +54,22 @@ class ServerState:
   def child(self, child: 'ServerState'):
     self.server.child = child
 
-  def on_client_join(self, client: ServerClient):
+  def frame(self, packet: Packet):
+    return PacketFrame(packet, self.server.buffer)
+
+  def broadcast(self, packet: Packet):
+    frame = self.frame(packet)
+    for client in self.clients:
+      client.send_frame(frame)
+
+  def on_client_join(self, client: 'ServerClient'):
+    pass
+
+  def on_client_leave(self, client: 'ServerClient'):
     pass
 
-  def on_client_leave(self, client: ServerClient):
+  def on_client_resume(self, client: 'ServerClient'):
     pass
 
-  def on_client_packet(self, client: ServerClient, packet: Packet):
+  def on_client_packet(self, client: 'ServerClient', packet: Packet):
     print(repr(packet))
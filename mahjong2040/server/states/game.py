@@ -1,8 +1,7 @@
 from mahjong2040 import score_calculator
 from mahjong2040.packets import (
     DrawClientPacket,
-    GameStateServerPacket,
-    GameStateStruct,
+    GameStateRequestClientPacket,
     Packet,
     RedrawClientPacket,
     RiichiClientPacket,
@@ -13,7 +12,6 @@ from mahjong2040.packets import (
 from mahjong2040.server.states.base import GamePlayer
 from mahjong2040.shared import (
     TSUMO_HONBA_POINTS,
-    ClientGameState,
     GameState,
     Tenpai,
     Wind,
@@ -28,6 +26,7 @@ class GameServerState(BaseGameServerStateMixin):
     self.game_state = game_state
 
   def init(self):
+    self.snapshot = None
     self.update_player_states()
 
   def on_client_packet(self, client: ServerClient, packet: Packet):
@@ -44,6 +43,8 @@ class GameServerState(BaseGameServerStateMixin):
       self.on_player_draw(player, packet)
     elif isinstance(packet, RedrawClientPacket):
       self.on_player_redraw()
+    elif isinstance(packet, GameStateRequestClientPacket):
+      self.send_game_state(client.seat)
 
   def on_player_riichi(self, player: GamePlayer):
     player.declare_riichi()
@@ -74,24 +75,15 @@ class GameServerState(BaseGameServerStateMixin):
     else:
       self.next_hand()
 
-    for index, p in enumerate(self.game_state.players):
-      p.send_packet(TsumoServerPacket(
-          game_state=ClientGameState(
-              index,
-              players=self.game_state.players,
-              starting_points=self.game_state.starting_points,
-              hand=self.game_state.hand,
-              repeat=self.game_state.repeat,
-              bonus_honba=self.game_state.bonus_honba,
-              bonus_riichi=self.game_state.bonus_riichi,
-          ),
-          tsumo_wind=tsumo_wind,
-          tsumo_hand=tsumo_hand,
-          points=tuple((
-              player.points - player_points[i]
-              for i, player in enumerate(self.game_state.players)
-          )),
-      ))
+    self.broadcast_game_state(TsumoServerPacket(
+        game_state=self.client_game_state(),
+        tsumo_wind=tsumo_wind,
+        tsumo_hand=tsumo_hand,
+        points=tuple((
+            player.points - player_points[i]
+            for i, player in enumerate(self.game_state.players)
+        )),
+    ))
 
   def on_player_ron(self, player: GamePlayer, packet: RonWindClientPacket):
     from .game_ron import GameRonPlayer, GameRonServerState
@@ -155,24 +147,8 @@ class GameServerState(BaseGameServerStateMixin):
     self.update_player_states()
 
   def save_game_state(self):
-    return
-    try:
-      with open('/game_state.bin', 'wb') as f:
-        buffer = bytearray(GameStateStruct.size())
-        GameStateStruct(self.game_state).pack(buffer)
-        f.write(buffer)
-    except BaseException as e:
-      print(e)
+    self.server.save_game_state(self.game_state)
 
   def update_player_states(self):
     self.save_game_state()
-    for index, player in enumerate(self.game_state.players):
-      player.send_packet(GameStateServerPacket(ClientGameState(
-          index,
-          players=self.game_state.players,
-          starting_points=self.game_state.starting_points,
-          hand=self.game_state.hand,
-          repeat=self.game_state.repeat,
-          bonus_honba=self.game_state.bonus_honba,
-          bonus_riichi=self.game_state.bonus_riichi,
-      )))
+    self.broadcast_game_state_delta()
@@ -4,7 +4,7 @@ from mahjong2040.packets import (
     DrawTenpaiServerPacket,
     Packet,
 )
-from mahjong2040.shared import DRAW_POINTS, ClientGameState, GameState, Tenpai, Wind
+from mahjong2040.shared import DRAW_POINTS, GameState, Tenpai, Wind
 
 from .shared import BaseGameServerStateMixin, GamePlayer, ServerClient
 
@@ -66,26 +66,17 @@ class GameDrawServerState(BaseGameServerStateMixin):
     else:
       self.next_hand(draw=True)
 
-    for index, p in enumerate(self.game_state.players):
-      p.send_packet(DrawServerPacket(
-          game_state=ClientGameState(
-              index,
-              players=self.game_state.players,
-              starting_points=self.game_state.starting_points,
-              hand=self.game_state.hand,
-              repeat=self.game_state.repeat,
-              bonus_honba=self.game_state.bonus_honba,
-              bonus_riichi=self.game_state.bonus_riichi,
-          ),
-          draw_hand=draw_hand,
-          tenpai=tuple((
-              player.tenpai == Tenpai.TENPAI
-              for player in self.game_state.players
-          )),
-          points=tuple((
-              player.points - player_points[i]
-              for i, player in enumerate(self.game_state.players)
-          )),
-      ))
+    self.broadcast_game_state(DrawServerPacket(
+        game_state=self.client_game_state(),
+        draw_hand=draw_hand,
+        tenpai=tuple((
+            player.tenpai == Tenpai.TENPAI
+            for player in self.game_state.players
+        )),
+        points=tuple((
+            player.points - player_points[i]
+            for i, player in enumerate(self.game_state.players)
+        )),
+    ))
 
     self.child = GameServerState(self.server, self.game_state)
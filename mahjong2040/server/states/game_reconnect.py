@@ -6,13 +6,15 @@ from mahjong2040.packets import (
     SetupPlayerWindClientPacket,
     SetupPlayerWindServerPacket,
 )
-from mahjong2040.shared import ClientGameState, GameState, Wind
+from mahjong2040.shared import ClientGameState, GameState, Phase, Wind
 
 from .base import ServerState
 from .shared import ServerClient
 
 
 class GameReconnectServerState(ServerState):
+  phase = Phase.RECONNECT
+
   def __init__(self, server, game_state: GameState, callback):
     self.server = server
     self.game_state = game_state
@@ -27,11 +29,15 @@ class GameReconnectServerState(ServerState):
     self.callback = callback
 
   def init(self):
+    for client in self.clients:
+      if client not in self.player_clients and self.server.resume_seat(client) is not None:
+        self.resume(client)
     self.ask_wind()
 
   def on_client_join(self, client: ServerClient):
     super().on_client_join(client)
-    client.send_packet(SetupPlayerWindServerPacket(self.wind))
+    if self.server.resume_seat(client) is None:
+      client.send_packet(SetupPlayerWindServerPacket(self.wind))
 
   def on_client_leave(self, client: ServerClient):
     super().on_client_leave(client)
@@ -40,24 +46,40 @@ class GameReconnectServerState(ServerState):
 
     self.ask_wind()
 
+  def on_client_resume(self, client: ServerClient):
+    self.resume(client)
+    self.ask_wind()
+
   def on_client_packet(self, client: ServerClient, packet: Packet):
     if isinstance(packet, SetupPlayerWindClientPacket):
       if self.wind == packet.wind:
-        self.player_clients[self.game_state.player_index_for_wind(self.wind)] = client
-        client.send_packet(ConfirmWindServerPacket(packet.wind))
-
-        index = self.game_state.player_index_for_wind(self.wind)
-        client.send_packet(GameStateServerPacket(ClientGameState(
-            index,
-            self.game_state.players,
-            self.game_state.hand,
-            self.game_state.repeat,
-            self.game_state.bonus_honba,
-            self.game_state.bonus_riichi,
-        )))
+        self.rejoin(client, self.game_state.player_index_for_wind(self.wind))
 
       self.ask_wind()
 
+  def resume(self, client: ServerClient):
+    index = self.server.resume_seat(client)
+    previous = self.player_clients[index]
+    if previous is client:
+      return
+
+    self.rejoin(client, index)
+    if previous in self.clients:
+      previous.close()
+
+  def rejoin(self, client: ServerClient, index: int):
+    self.player_clients[index] = client
+    client.send_packet(ConfirmWindServerPacket((index - self.game_state.hand) % len(Wind)))
+    client.send_packet(GameStateServerPacket(ClientGameState(
+        index,
+        self.game_state.players,
+        self.game_state.starting_points,
+        self.game_state.hand,
+        self.game_state.repeat,
+        self.game_state.bonus_honba,
+        self.game_state.bonus_riichi,
+    )))
+
   def missing_winds(self):
     for wind in range(len(Wind)):
       player_client = self.player_clients[self.game_state.player_index_for_wind(wind)]
@@ -71,8 +93,14 @@ class GameReconnectServerState(ServerState):
       self.callback(self.player_clients)
       return
 
-    for client in self.clients:
-      if client in self.player_clients:
-        client.send_packet(GameReconnectStatusServerPacket(set(self.missing_winds())))
-      else:
-        client.send_packet(SetupPlayerWindServerPacket(self.wind))
+    waiting = [client for client in self.clients if client not in self.player_clients]
+    if len(waiting) < len(self.clients):
+      status_frame = self.frame(GameReconnectStatusServerPacket(set(self.missing_winds())))
+      for client in self.clients:
+        if client in self.player_clients:
+          client.send_frame(status_frame)
+
+    if waiting:
+      wind_frame = self.frame(SetupPlayerWindServerPacket(self.wind))
+      for client in waiting:
+        client.send_frame(wind_frame)
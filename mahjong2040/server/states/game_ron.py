@@ -6,7 +6,7 @@ from mahjong2040.packets import (
     RonServerPacket,
     RonWindServerPacket,
 )
-from mahjong2040.shared import RON_HONBA_POINTS, ClientGameState, GameState, Wind
+from mahjong2040.shared import RON_HONBA_POINTS, GameState, Wind
 
 from .shared import BaseGameServerStateMixin, GamePlayer, ServerClient
 
@@ -80,23 +80,14 @@ class GameRonServerState(BaseGameServerStateMixin):
     else:
       self.next_hand()
 
-    for index, p in enumerate(self.game_state.players):
-      p.send_packet(RonServerPacket(
-          game_state=ClientGameState(
-              index,
-              players=self.game_state.players,
-              starting_points=self.game_state.starting_points,
-              hand=self.game_state.hand,
-              repeat=self.game_state.repeat,
-              bonus_honba=self.game_state.bonus_honba,
-              bonus_riichi=self.game_state.bonus_riichi,
-          ),
-          ron_wind=self.from_wind,
-          ron_hand=hand,
-          points=tuple((
-              player.points - player_points[i]
-              for i, player in enumerate(self.game_state.players)
-          )),
-      ))
+    self.broadcast_game_state(RonServerPacket(
+        game_state=self.client_game_state(),
+        ron_wind=self.from_wind,
+        ron_hand=hand,
+        points=tuple((
+            player.points - player_points[i]
+            for i, player in enumerate(self.game_state.players)
+        )),
+    ))
 
     self.child = GameServerState(self.server, self.game_state)
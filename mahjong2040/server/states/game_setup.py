@@ -7,18 +7,20 @@ from mahjong2040.packets import (
     SetupPlayerWindClientPacket,
     SetupPlayerWindServerPacket,
 )
-from mahjong2040.shared import STARTING_POINTS, GamePlayerMixin, GameState, Wind
+from mahjong2040.shared import STARTING_POINTS, GamePlayerMixin, GameState, Phase, Wind
 
 from .base import ServerState
 from .game import GameServerState
 from .shared import GamePlayer, ServerClient
 
 if typing.TYPE_CHECKING:
-  from mahjong2040.server import Server
+  from mahjong2040.server.table import Table
 
 
 class GameSetupServerState(ServerState):
-  def __init__(self, server: Server, game_state: GameState[GamePlayerMixin] | None = None):
+  phase = Phase.SETUP
+
+  def __init__(self, server: 'Table', game_state: GameState[GamePlayerMixin] | None = None):
     super().__init__(server)
 
     self.players: list[ServerClient] = []
@@ -28,22 +30,16 @@ class GameSetupServerState(ServerState):
     self.ask_next_wind()
 
   def ask_next_wind(self):
-    wind = len(self.players)
-    packet = SetupPlayerWindServerPacket(wind)
-    for client in self.clients:
-      client.send_packet(packet)
+    self.broadcast(SetupPlayerWindServerPacket(len(self.players)))
 
   def on_client_leave(self, client: ServerClient):
     super().on_client_leave(client)
-    if client in self.clients:
-      if not self.enough_players():
-        return self.to_lobby()
-    elif client in self.players:
+    if not self.enough_players():
+      return self.to_lobby()
+
+    if client in self.players:
       player_index = self.players.index(client)
       self.players.remove(client)
-      if not self.enough_players():
-        return self.to_lobby()
-
       if player_index < len(self.players):
         self.players = []
 
@@ -58,6 +54,9 @@ class GameSetupServerState(ServerState):
       client.send_packet(ConfirmWindServerPacket(packet.wind))
 
       if len(self.players) == len(Wind):
+        for index, player in enumerate(self.players):
+          player.seat = index
+        self.server.issue_resume_tokens(self.players)
         game_state = self.game_state
         self.child = GameServerState(
             server=self.server,
@@ -72,7 +71,7 @@ class GameSetupServerState(ServerState):
               )),
               starting_points=game_state.starting_points if game_state else STARTING_POINTS,
               hand=game_state.hand if game_state else 0,
-              repeat=game_state.starting_points if game_state else 0,
+              repeat=game_state.repeat if game_state else 0,
               bonus_honba=game_state.bonus_honba if game_state else 0,
               bonus_riichi=game_state.bonus_riichi if game_state else 0,
           ),
@@ -86,7 +85,5 @@ class GameSetupServerState(ServerState):
   def to_lobby(self):
     from .lobby import LobbyServerState
 
-    packet = SetupPlayerCountErrorServerPacket()
-    for client in self.clients:
-      client.send_packet(packet)
+    self.broadcast(SetupPlayerCountErrorServerPacket())
     self.child = LobbyServerState(self.server)
@@ -7,11 +7,11 @@ from .base import ServerState
 from .shared import ServerClient
 
 if typing.TYPE_CHECKING:
-  from mahjong2040.server import Server
+  from mahjong2040.server.table import Table
 
 
 class LobbyServerState(ServerState):
-  def __init__(self, server: Server, game_state: GameState[GamePlayerMixin] | None = None):
+  def __init__(self, server: 'Table', game_state: GameState[GamePlayerMixin] | None = None):
     self.server = server
     self.game_state = game_state
 
@@ -31,6 +31,4 @@ class LobbyServerState(ServerState):
     self.send_lobby_count()
 
   def send_lobby_count(self):
-    packet = LobbyPlayersServerPacket(len(self.clients), len(Wind))
-    for client in self.clients:
-      client.send_packet(packet)
+    self.broadcast(LobbyPlayersServerPacket(len(self.clients), len(Wind)))
@@ -1,7 +1,15 @@
 from typing import Generic, TypeVar
 
+from mahjong2040.packets import (
+    CAP_DELTA,
+    GameCountersStruct,
+    GameStateDeltaServerPacket,
+    GameStatePacket,
+    GameStateServerPacket,
+    PlayerStruct,
+)
 from mahjong2040.server.shared import ServerClient
-from mahjong2040.shared import RIICHI_POINTS, GameState
+from mahjong2040.shared import RIICHI_POINTS, ClientGameState, GameState, Phase
 
 from .base import GamePlayer, ServerState
 
@@ -9,6 +17,10 @@ _GamePlayer = TypeVar('_GamePlayer', bound=GamePlayer)
 
 
 class BaseGameServerStateMixin(Generic[_GamePlayer], ServerState):
+  phase = Phase.GAME
+  snapshot: tuple | None = None
+  seq = 0
+
   def __init__(self, server, game_state: GameState[_GamePlayer]):
     self.server = server
     self.game_state = game_state
@@ -21,25 +33,110 @@ class BaseGameServerStateMixin(Generic[_GamePlayer], ServerState):
 
     self.on_player_leave(player)
 
+  def on_client_resume(self, client: ServerClient):
+    player = self.game_state.players[self.server.resume_seat(client)]
+    if player.client is not client and player.client in self.clients:
+      player.client.close()
+
   def on_player_leave(self, player: _GamePlayer):
     from .game_reconnect import GameReconnectServerState
 
     self.child = GameReconnectServerState(self.server, self.game_state, self.on_players_rejoin)
 
   def on_players_rejoin(self, clients: list[ServerClient]):
-    self.child = self
     for index, player in enumerate(self.game_state.players):
       player.client = clients[index]
+      player.client.seat = index
+    self.child = self
 
   def player_for_client(self, client: ServerClient):
-    try:
-      return next((
-          player
-          for player in self.game_state.players
-          if player.client == client
-      ))
-    except StopIteration:
+    if client.seat is None:
+      return None
+
+    player = self.game_state.players[client.seat]
+    if player.client is not client:
       return None
+    return player
+
+  def client_game_state(self):
+    return ClientGameState(
+        0,
+        players=self.game_state.players,
+        starting_points=self.game_state.starting_points,
+        hand=self.game_state.hand,
+        repeat=self.game_state.repeat,
+        bonus_honba=self.game_state.bonus_honba,
+        bonus_riichi=self.game_state.bonus_riichi,
+    )
+
+  def game_state_snapshot(self):
+    return (
+        (
+            self.game_state.hand,
+            self.game_state.repeat,
+            self.game_state.bonus_honba,
+            self.game_state.bonus_riichi,
+        ),
+        tuple((
+            (player.points, player.riichi)
+            for player in self.game_state.players
+        )),
+    )
+
+  def broadcast_game_state(self, packet: GameStatePacket):
+    frame = self.frame(packet)
+    for index, player in enumerate(self.game_state.players):
+      frame.set_player_index(index)
+      player.send_frame(frame)
+
+    self.snapshot = self.game_state_snapshot()
+    self.seq = 0
+
+  def send_game_state(self, index: int):
+    snapshot = self.snapshot
+    self.broadcast_game_state_delta()
+    if snapshot is None:
+      return
+
+    frame = self.frame(GameStateServerPacket(self.client_game_state()))
+    frame.set_player_index(index)
+    self.game_state.players[index].send_frame(frame)
+
+  def broadcast_game_state_delta(self):
+    snapshot = self.game_state_snapshot()
+    if self.snapshot is None or self.seq == 255:
+      return self.broadcast_game_state(GameStateServerPacket(self.client_game_state()))
+
+    if snapshot == self.snapshot:
+      return
+
+    counters, players = snapshot
+    last_counters, last_players = self.snapshot
+    self.snapshot = snapshot
+    self.seq += 1
+    frame = self.frame(GameStateDeltaServerPacket(
+        self.seq,
+        players=tuple((
+            PlayerStruct(*player) if player != last_players[index] else None
+            for index, player in enumerate(players)
+        )),
+        counters=GameCountersStruct(*counters) if counters != last_counters else None,
+    ))
+
+    full = []
+    for index, player in enumerate(self.game_state.players):
+      if player.client.capabilities & CAP_DELTA:
+        player.send_frame(frame)
+      else:
+        full.append(index)
+
+    if not full:
+      return
+
+    full_frame = self.frame(GameStateServerPacket(self.client_game_state()))
+    for index in full:
+      full_frame.set_player_index(index)
+      self.game_state.players[index].send_frame(full_frame)
 
   def distribute_riichi_points(self, winners: list[_GamePlayer]):
     winner = next((
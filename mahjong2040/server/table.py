@@ -0,0 +1,120 @@
+import os
+import typing
+
+from mahjong2040.packets import (
+    CAP_RESUME,
+    RESUME_TOKEN_SIZE,
+    BroadcastServerPacket,
+    Packet,
+    ResumeTokenServerPacket,
+)
+from mahjong2040.shared import GamePlayerMixin, GameState, Phase
+
+from .shared import ServerClient
+
+if typing.TYPE_CHECKING:
+  from mahjong2040.server import Server
+
+  from .states.base import ServerState
+
+
+class Table:
+  def __init__(
+      self,
+      server: 'Server',
+      index: int,
+      game_state: GameState[GamePlayerMixin] | None = None,
+      name='',
+  ):
+    from .states.lobby import LobbyServerState
+
+    self.server = server
+    self.index = index
+    self.name = name
+    self.clients: list[ServerClient] = []
+    self.resume_tokens: list[bytes] = []
+    self.broadcast_key: tuple | None = None
+    self.broadcast_data = b''
+    self._child: ServerState | None = None
+    self.child = LobbyServerState(self, game_state)
+
+  @property
+  def poll(self):
+    return self.server.poll
+
+  @property
+  def buffer(self):
+    return self.server.buffer
+
+  @property
+  def child(self):
+    return self._child
+
+  @child.setter
+  def child(self, value: 'ServerState'):
+    if self._child is value:
+      return
+
+    self._child = value
+    self._child.init()
+    self.server.announce(self.index)
+
+  def add_client(self, client: ServerClient):
+    client.table = self
+    self.clients.append(client)
+    if self.child:
+      self.child.on_client_join(client)
+    self.server.announce(self.index)
+
+  def remove_client(self, client: ServerClient):
+    self.clients.remove(client)
+    client.table = None
+    if self.child:
+      self.child.on_client_leave(client)
+    self.server.announce(self.index)
+
+  def save_game_state(self, game_state: GameState):
+    self.server.save_game_state(self.index, game_state)
+
+  def on_client_packet(self, client: ServerClient, packet: Packet):
+    if self.child:
+      self.child.on_client_packet(client, packet)
+
+  def issue_resume_tokens(self, clients: list[ServerClient]):
+    self.resume_tokens = [
+        os.urandom(RESUME_TOKEN_SIZE)
+        for _ in clients
+    ]
+    for client, token in zip(clients, self.resume_tokens):
+      if client.capabilities & CAP_RESUME:
+        client.send_packet(ResumeTokenServerPacket(token))
+
+  def resume_seat(self, client: ServerClient):
+    try:
+      return self.resume_tokens.index(client.resume_token)
+    except ValueError:
+      return None
+
+  def on_client_resume(self, client: ServerClient):
+    if self.child and self.resume_seat(client) is not None:
+      self.child.on_client_resume(client)
+
+  def broadcast_reply(self):
+    child = self.child
+    game_state = child.game_state if child else None
+    key = (
+        child.phase if child else Phase.LOBBY,
+        len(self.clients),
+        game_state.hand if game_state else 0,
+    )
+    if key != self.broadcast_key:
+      phase, seated, hand = key
+      self.broadcast_key = key
+      self.broadcast_data = bytes(self.buffer.pack(BroadcastServerPacket(
+          seated=seated,
+          phase=phase,
+          hand=hand,
+          name=self.name,
+          table=self.index,
+      )))
+    return self.broadcast_data
@@ -0,0 +1,437 @@
+import select
+import socket
+import subprocess
+import sys
+import traceback
+
+from mahjong2040.packets import (
+    DECODE_ERRORS,
+    MAX_PACKET_SIZE,
+    GameStateStruct,
+    HelloClientPacket,
+    JoinTableClientPacket,
+    LengthStruct,
+    Packet,
+    ResumeClientPacket,
+    set_nodelay,
+    unpack_packet,
+    would_block,
+)
+from mahjong2040.poll import Poll, TimerHandle
+from mahjong2040.shared import GameState
+
+from . import Server
+from .shared import CLIENT_EVENTS, ServerClient
+from .table import Table
+
+CHANNEL_SIZE = 1024
+CHANNEL_QUEUE_LIMIT = 256
+ROUTE_TIMEOUT = 250
+RESPAWN_DELAY = 1000
+REPLY_MESSAGE = 0
+SNAPSHOT_MESSAGE = 1
+
+
+def channel_pair():
+  return socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+
+
+class PendingClient:
+  def __init__(self, _socket: socket.socket):
+    self._socket = _socket
+    self.data = bytearray()
+    self.offset = 0
+    self.timer: TimerHandle | None = None
+
+  def route(self) -> int | None:
+    header_size = LengthStruct.size()
+    while len(self.data) - self.offset >= header_size:
+      (length,) = LengthStruct.codec.unpack_from(self.data, self.offset)
+      if not length or length > MAX_PACKET_SIZE:
+        return 0
+
+      frame_start = self.offset + header_size
+      frame_end = frame_start + length
+      if frame_end > len(self.data):
+        return None
+
+      self.offset = frame_end
+      try:
+        packet = unpack_packet(self.data, frame_start)
+      except DECODE_ERRORS:
+        return 0
+
+      if isinstance(packet, JoinTableClientPacket):
+        return packet.table
+      elif not isinstance(packet, (HelloClientPacket, ResumeClientPacket)):
+        return 0
+    return None
+
+
+class Worker:
+  def __init__(self, dispatcher: 'Dispatcher', table_ids: list[int]):
+    self.dispatcher = dispatcher
+    self.table_ids = table_ids
+    self.queue: list[tuple[socket.socket | None, bytes]] = []
+    self.waiting = False
+    self.channel, remote = channel_pair()
+    self.channel.setblocking(False)
+    self.process = subprocess.Popen(
+        dispatcher.worker_args(remote.fileno(), table_ids),
+        pass_fds=(remote.fileno(),),
+    )
+    remote.close()
+    dispatcher.poll.register(self.channel, select.POLLIN, self.on_channel_data)
+    for table in table_ids:
+      snapshot = dispatcher.snapshots.get(table)
+      if snapshot is not None:
+        self.send(None, bytes([table]) + snapshot)
+
+  def on_channel_data(self, _socket: socket.socket, event: int):
+    if event & select.POLLOUT:
+      self.flush()
+    if not event & (select.POLLIN | select.POLLHUP | select.POLLERR):
+      return
+
+    try:
+      data = _socket.recv(CHANNEL_SIZE)
+    except OSError as e:
+      if would_block(e):
+        return
+      data = b''
+
+    if not data:
+      return self.dispatcher.on_worker_exit(self)
+    self.dispatcher.on_worker_message(data)
+
+  def hand_off(self, _socket: socket.socket, table: int, data: bytes):
+    self.send(_socket, bytes([table]) + data)
+
+  def send(self, _socket: socket.socket | None, data: bytes):
+    if len(self.queue) >= CHANNEL_QUEUE_LIMIT:
+      print(self.__class__.__name__, 'queue full')
+      if _socket is not None:
+        _socket.close()
+      return
+
+    self.queue.append((_socket, data))
+    if not self.waiting:
+      self.flush()
+
+  def flush(self):
+    while self.queue:
+      _socket, data = self.queue[0]
+      try:
+        if _socket is None:
+          self.channel.send(data)
+        else:
+          socket.send_fds(self.channel, [data], [_socket.fileno()])
+      except OSError as e:
+        if would_block(e):
+          return self.wait(True)
+        print(self.__class__.__name__, e)
+        return self.clear()
+
+      self.queue.pop(0)
+      if _socket is not None:
+        _socket.close()
+    self.wait(False)
+
+  def wait(self, waiting: bool):
+    if waiting == self.waiting:
+      return
+
+    self.waiting = waiting
+    self.dispatcher.poll.modify(self.channel, (select.POLLIN | select.POLLOUT) if waiting else select.POLLIN)
+
+  def clear(self):
+    for _socket, _ in self.queue:
+      if _socket is not None:
+        _socket.close()
+    self.queue = []
+
+  def close(self):
+    self.clear()
+    self.dispatcher.poll.unregister(self.channel)
+    self.channel.close()
+    if self.process.poll() is None:
+      self.process.terminate()
+    self.process.wait()
+
+
+class Dispatcher(Server):
+  def __init__(
+      self,
+      poll: Poll,
+      name: str,
+      heartbeat_interval: int,
+      heartbeat_misses: int,
+      tables: int,
+      workers: int,
+  ):
+    super().__init__(
+        poll,
+        name=name,
+        heartbeat_interval=heartbeat_interval,
+        heartbeat_misses=heartbeat_misses,
+        table_ids=[],
+    )
+    self.table_count = tables
+    self.replies: dict[int, bytes] = {}
+    self.snapshots: dict[int, bytes] = {}
+    self.pending: dict[int, PendingClient] = {}
+    self.workers = [
+        Worker(self, list(range(index, tables, workers)))
+        for index in range(min(workers, tables))
+    ]
+
+  def worker_args(self, fd: int, table_ids: list[int]):
+    return [
+        sys.executable, '-m', 'mahjong2040.server',
+        '--tables', str(self.table_count),
+        '--name', self.name,
+        '--heartbeat-interval', str(self.heartbeat_interval),
+        '--heartbeat-misses', str(self.heartbeat_misses),
+        '--worker-fd', str(fd),
+        '--worker-tables', ','.join([str(table) for table in table_ids]),
+    ]
+
+  def worker_for_table(self, table: int):
+    for worker in self.workers:
+      if table in worker.table_ids:
+        return worker
+    return None
+
+  def broadcast_replies(self):
+    return list(self.replies.values())
+
+  def broadcast_reply(self, index: int):
+    return self.replies.get(index)
+
+  def on_worker_message(self, data: bytes):
+    if data[0] == SNAPSHOT_MESSAGE:
+      self.snapshots[data[1]] = data[2:]
+      return
+
+    reply = unpack_packet(data, 1 + LengthStruct.size())
+    self.replies[reply.table] = data[1:]
+    self.announce(reply.table)
+
+  def on_worker_exit(self, worker: Worker):
+    print(self.__class__.__name__, 'worker exited', worker.table_ids)
+    worker.close()
+    for table in worker.table_ids:
+      self.replies.pop(table, None)
+    self.poll.call_later(RESPAWN_DELAY, self.respawn, worker)
+
+  def respawn(self, worker: Worker):
+    if worker not in self.workers:
+      return
+
+    self.workers[self.workers.index(worker)] = Worker(self, worker.table_ids)
+
+  def on_server_data(self, _socket: socket.socket, event: int):
+    if event & select.POLLIN:
+      client, _ = _socket.accept()
+      client.setblocking(False)
+      set_nodelay(client)
+      pending = PendingClient(client)
+      self.pending[id(client)] = pending
+      self.poll.register(client, CLIENT_EVENTS, self.on_pending_data)
+      pending.timer = self.poll.call_later(ROUTE_TIMEOUT, self.dispatch, pending, 0)
+
+  def on_pending_data(self, _socket: socket.socket, event: int):
+    pending = self.pending.get(id(_socket))
+    if pending is None:
+      return
+
+    data = b''
+    if event & select.POLLIN:
+      try:
+        data = _socket.recv(CHANNEL_SIZE)
+      except OSError:
+        pass
+
+    if not data:
+      return self.drop(pending)
+
+    pending.data.extend(data)
+    if len(pending.data) >= CHANNEL_SIZE:
+      return self.drop(pending)
+
+    table = pending.route()
+    if table is not None:
+      self.dispatch(pending, table)
+
+  def dispatch(self, pending: PendingClient, table: int):
+    worker = self.worker_for_table(table)
+    if worker is None or worker.process.poll() is not None:
+      return self.drop(pending)
+
+    self.release(pending)
+    worker.hand_off(pending._socket, table, bytes(pending.data))
+
+  def release(self, pending: PendingClient):
+    if pending.timer is not None:
+      pending.timer.cancel()
+    del self.pending[id(pending._socket)]
+    self.poll.unregister(pending._socket)
+
+  def drop(self, pending: PendingClient):
+    self.release(pending)
+    pending._socket.close()
+
+  def close(self):
+    for pending in list(self.pending.values()):
+      self.drop(pending)
+    for worker in self.workers:
+      worker.close()
+    self.workers = []
+    super().close()
+
+
+class WorkerServer(Server):
+  def __init__(self, poll: Poll, channel: socket.socket, **kwargs):
+    self.channel = channel
+    self.channel.setblocking(False)
+    self.waiting = False
+    self.reporting = False
+    self.reported: dict[int, bytes] = {}
+    self.changed: set[int] = set()
+    self.snapshots: dict[int, bytes] = {}
+    self.saved: set[int] = set()
+    super().__init__(poll, **kwargs)
+    self.poll.register(channel, select.POLLIN, self.on_channel_data)
+    self.heartbeat_timer = self.poll.call_later(self.heartbeat_interval, self.heartbeat)
+
+  def announce(self, table: int | None = None):
+    self.changed.update(self.tables if table is None else (table,))
+    self.schedule_report()
+
+  def save_game_state(self, table: int, game_state: GameState):
+    buffer = bytearray(GameStateStruct.size())
+    GameStateStruct(game_state).pack(buffer)
+    self.snapshots[table] = bytes(buffer)
+    self.saved.add(table)
+    self.schedule_report()
+
+  def saved_game_state(self, table: int) -> GameState | None:
+    snapshot = self.snapshots.get(table)
+    if snapshot is None:
+      return None
+    return GameStateStruct.from_data(snapshot).game_state
+
+  def restore_game_state(self, table: int, snapshot: bytes):
+    from .states.lobby import LobbyServerState
+
+    self.snapshots[table] = snapshot
+    if not self.tables[table].clients:
+      self.tables[table].child = LobbyServerState(self.tables[table], self.saved_game_state(table))
+
+  def schedule_report(self):
+    if self.reporting:
+      return
+
+    self.reporting = True
+    self.poll.call_soon(self.report)
+
+  def report(self):
+    self.reporting = False
+    while self.saved:
+      index = self.saved.pop()
+      if not self.send(bytes([SNAPSHOT_MESSAGE, index]) + self.snapshots[index]):
+        self.saved.add(index)
+        return
+
+    while self.changed:
+      index = self.changed.pop()
+      data = self.tables[index].broadcast_reply()
+      if self.reported.get(index) is data:
+        continue
+
+      if not self.send(bytes([REPLY_MESSAGE]) + data):
+        self.changed.add(index)
+        return
+      self.reported[index] = data
+    self.wait(False)
+
+  def send(self, data: bytes) -> bool:
+    try:
+      self.channel.send(data)
+    except OSError as e:
+      if not would_block(e):
+        raise SystemExit()
+      self.wait(True)
+      return False
+    return True
+
+  def wait(self, waiting: bool):
+    if waiting == self.waiting:
+      return
+
+    self.waiting = waiting
+    self.poll.modify(self.channel, (select.POLLIN | select.POLLOUT) if waiting else select.POLLIN)
+
+  def on_channel_data(self, _socket: socket.socket, event: int):
+    if event & select.POLLOUT:
+      self.report()
+    if not event & (select.POLLIN | select.POLLHUP | select.POLLERR):
+      return
+
+    try:
+      data, fds, _, _ = socket.recv_fds(_socket, CHANNEL_SIZE, 1)
+    except OSError as e:
+      if would_block(e):
+        return
+      raise SystemExit()
+
+    if not data:
+      raise SystemExit()
+    if not fds:
+      return self.restore_game_state(data[0], data[1:])
+
+    for fd in fds:
+      client = socket.socket(fileno=fd)
+      client.setblocking(False)
+      self.poll.register(client, CLIENT_EVENTS, self.on_client_data)
+      self.on_client_connect(client)
+      remote = self.sockets[id(client)]
+      remote.reader.feed(data[1:])
+      self.on_client_data(client, select.POLLIN)
+      if remote.seat_timer is not None:
+        remote.seat_timer.cancel()
+        remote.seat_timer = None
+        self.add_client(remote, data[0])
+
+  def add_client(self, client: ServerClient, table=0):
+    try:
+      super().add_client(client, table)
+    except Exception:
+      self.on_table_error(self.tables[table])
+
+  def remove_client(self, client: ServerClient):
+    table = client.table
+    try:
+      super().remove_client(client)
+    except Exception:
+      self.on_table_error(table)
+
+  def on_client_packet(self, client: ServerClient, packet: Packet):
+    table = client.table
+    try:
+      super().on_client_packet(client, packet)
+    except Exception:
+      self.on_table_error(client.table or table)
+
+  def on_table_error(self, table: Table | None):
+    if table is None:
+      raise
+
+    from .states.lobby import LobbyServerState
+
+    print(self.__class__.__name__, 'table', table.index, 'failed')
+    traceback.print_exc()
+    for client in table.clients:
+      client.close()
+    table.resume_tokens = []
+    table.child = LobbyServerState(table, self.saved_game_state(table.index))
@@ -62,6 +62,16 @@ class TenpaiState(IntEnum):
 Tenpai = TenpaiState()
 
 
+class PhaseState(IntEnum):
+  LOBBY = 0
+  SETUP = 1
+  GAME = 2
+  RECONNECT = 3
+
+
+Phase = PhaseState()
+
+
 class GamePlayerMixin:
   points: int
   riichi: bool
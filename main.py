@@ -2,12 +2,17 @@ from badger_ui.base import app_runner
 
 
 def start():
+  from mahjong2040 import config
   from mahjong2040.app import MyApp
 
   app_runner.app = MyApp(1246)
   try:
-    while True:
-      app_runner.update()
+    if config.transport == config.Transport.ASYNCIO:
+      from mahjong2040 import aiopoll
+      aiopoll.asyncio.run(aiopoll.run(app_runner, tasks=app_runner.app.tasks))
+    else:
+      while True:
+        app_runner.update()
   finally:
     app_runner.app.close()
 